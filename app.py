@@ -5,9 +5,12 @@ import bcrypt
 import numpy as np
 import re
 import PyPDF2
-from sqlalchemy import create_engine, text
 from src.demand_model import build_features, train_model
+from src.history_writer import log_recommendation, log_search
 from src.preprocess import preprocess_data
+from src.repositories import application_repo, history_repo, user_repo
+from src.search import SearchEngine, SearchResults
+from src.typeahead import Typeahead
 
 # Internship Demand Analytics App - Fixed for Streamlit Cloud deployment
 
@@ -18,108 +21,97 @@ try:
 except ImportError:
     HAS_PSYCOPG2 = False
 
-def calculate_skill_score_only(row, user_skills):
-    """Calculate pure skill matching score for display"""
-    if not user_skills or pd.isna(row.get('skills_required')):
-        return 0
-
-    job_skills = set(str(row['skills_required']).split(', '))
-    if not job_skills:
-        return 0
-
-    matched_skills = len(set(user_skills).intersection(job_skills))
-    return (matched_skills / len(job_skills)) * 100
-
 def current_user():
     return st.session_state.user.strip().lower()
 
-# ================= DATABASE =================
-# ================= DATABASE =================
-def db():
-    # Completely safe database connection - no Streamlit calls during import
+def search_state_caption():
+    """
+    Size of the result arrays behind the current search, for monitoring
+
+    Without exclusions the session holds the shared cached ranking, so its
+    size is not memory owned by this session.
+    """
+    results = st.session_state.get("search_results")
+    if not isinstance(results, SearchResults) or not results.nbytes:
+        return None
+    owner = "this session's filtered copy" if st.session_state.get("search_results_filtered") else "shared across sessions"
+    return f"🧠 Result arrays: {results.nbytes / 1024:.1f} KB ({owner})"
+
+def applied_titles():
+    """
+    Lower-cased titles this user has applied to
+
+    Loaded from the database on first use after login and kept in session
+    state as a set; apply_to() adds to it in place, so reruns and Apply
+    clicks don't query again. invalidate_applied_titles() forces a reload.
+    """
+    cache = st.session_state.get("applied_titles_cache")
+    if cache is None:
+        try:
+            cache = set(application_repo.applied_titles(current_user()))
+        except Exception:
+            return set()  # Not cached, so the next rerun retries
+        st.session_state.applied_titles_cache = cache
+    return cache
+
+def invalidate_applied_titles():
+    st.session_state.pop("applied_titles_cache", None)
+    st.session_state.pop("application_summary_cache", None)
+
+def application_summary():
+    """
+    (total applications, distinct companies, latest applied_at) for this user
+
+    The counts scan all of the user's applications, so they are computed
+    once and kept in session state next to the applied-titles set; only a
+    new application makes apply_to() drop them for a recount.
+    """
+    summary = st.session_state.get("application_summary_cache")
+    if summary is None:
+        summary = application_repo.summary(current_user())
+        st.session_state.application_summary_cache = summary
+    return summary
+
+def apply_to(job):
+    """Record an application and add its title to the session's applied set"""
     try:
-        # Only try PostgreSQL if we're in a proper Streamlit runtime context
-        import streamlit as st
-        if hasattr(st, 'runtime') and st.runtime.exists():
-            try:
-                if hasattr(st, 'secrets') and 'db' in st.secrets and 'url' in st.secrets['db']:
-                    from sqlalchemy import create_engine, text
-                    engine = create_engine(st.secrets["db"]["url"], connect_args={
-                        'connect_timeout': 10,  # 10 second timeout
-                        'sslmode': 'require'
-                    })
-                    # Test the connection with timeout
-                    with engine.connect() as conn:
-                        conn.execute(text("SELECT 1"))
-                    return engine
-            except Exception as e:
-                # Suppress verbose PostgreSQL errors - we expect this to fail and fall back to SQLite
-                pass  # Fall through to SQLite
-    except:
-        pass  # Not in Streamlit context
-
-    # Always fallback to local SQLite for development/safety
-    from sqlalchemy import create_engine
-    return create_engine("sqlite:///users.db")
-
-def init_db():
+        added = application_repo.add(current_user(), job["title"], job["company"], job["location"])
+    except Exception:
+        invalidate_applied_titles()  # The insert may have committed before failing
+        raise
+    applied_titles().add(job["title"].lower())
+    if added:
+        st.session_state.pop("application_summary_cache", None)
+
+def history_page(key, fetch):
+    """Current page of a keyset-paged history view: (DataFrame, cursor for the next page)"""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    return fetch(current_user(), cursors[-1])
+
+def history_pager(key, next_cursor):
+    """Newer / Older buttons for a history view; each page is one seek query"""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("◀ Newer", key=f"{key}_newer", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        if next_cursor is not None and st.button("Older ▶", key=f"{key}_older", use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+
+def show_archived_history(table, label):
+    """Weekly counts for history older than the retention window, if any"""
     try:
-        engine = db()
-        with engine.connect() as conn:
-            # Get raw connection for cursor operations
-            raw_conn = conn.connection if hasattr(conn, 'connection') else conn
-            cur = raw_conn.cursor()
-
-            # Check if it's PostgreSQL or SQLite based on engine URL
-            if 'postgresql' in str(engine.url):
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username TEXT UNIQUE,
-                    email TEXT UNIQUE,
-                    password BYTEA,
-                    role TEXT
-                );
-                """)
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS applications (
-                    id SERIAL PRIMARY KEY,
-                    username TEXT,
-                    job_title TEXT,
-                    company TEXT,
-                    location TEXT,
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                """)
-            else:  # SQLite
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE,
-                    email TEXT UNIQUE,
-                    password BLOB,
-                    role TEXT
-                );
-                """)
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS applications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT,
-                job_title TEXT,
-                company TEXT,
-                location TEXT,
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """)
-
-        conn.commit()
-        conn.close()
-        print("Database initialized successfully")
-    except Exception as e:
-        print(f"Database initialization failed: {e}")
-
-# Database already initialized
-init_db()
+        weekly = history_repo.weekly(table, current_user())
+    except Exception:
+        return
+    if not weekly.empty:
+        with st.expander(label):
+            st.dataframe(weekly, width='stretch')
 
 # ================= PASSWORD =================
 def strong_password(p):
@@ -137,74 +129,17 @@ def register_user(username, email, password, role):
         return False, "Weak password"
 
     try:
-        engine = db()
         hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-
-        # Check if it's PostgreSQL or SQLite based on engine URL
-        if 'postgresql' in str(engine.url):
-            with engine.connect() as conn:
-                # Check if user exists
-                result = conn.execute(text("""
-                    SELECT username FROM users WHERE LOWER(username)=:username OR email=:email
-                """), {"username": username.lower(), "email": email})
-                if result.fetchone():
-                    return False, "User already exists"
-
-                # Insert new user
-                conn.execute(text("""
-                    INSERT INTO users (username, email, password, role)
-                    VALUES (:username, :email, :password, :role)
-                """), {
-                    "username": username.lower().strip(),
-                    "email": email,
-                    "password": hashed,
-                    "role": role
-                })
-                conn.commit()
-        else:  # SQLite
-            with engine.connect() as conn:
-                # Check if user exists
-                result = conn.execute(text("""
-                    SELECT username FROM users WHERE LOWER(username)=:username OR email=:email
-                """), {"username": username.lower(), "email": email})
-                if result.fetchone():
-                    return False, "User already exists"
-
-                # Insert new user
-                conn.execute(text("""
-                    INSERT INTO users (username, email, password, role)
-                    VALUES (:username, :email, :password, :role)
-                """), {
-                    "username": username.lower().strip(),
-                    "email": email,
-                    "password": hashed,
-                    "role": role
-                })
-                conn.commit()
-
+        if not user_repo.register(username, email, hashed, role):
+            return False, "User already exists"
         return True, "Account created successfully"
     except Exception as e:
         return False, f"Registration failed: {e}"
 
 def validate_login(username, password):
     try:
-        engine = db()
-
-        # Check if it's PostgreSQL or SQLite based on engine URL
-        if 'postgresql' in str(engine.url):
-            with engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT password, role FROM users WHERE LOWER(username)=:username
-                """), {"username": username.lower()})
-                user_data = result.fetchone()
-        else:  # SQLite
-            with engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT password, role FROM users WHERE LOWER(username)=:username
-                """), {"username": username.lower()})
-                user_data = result.fetchone()
-
-        if user_data and bcrypt.checkpw(password.encode(), user_data[0] if 'postgresql' in str(engine.url) else user_data[0]):
+        user_data = user_repo.credentials(username)
+        if user_data and bcrypt.checkpw(password.encode(), user_data[0]):
             return user_data[1]  # Return role
         return None
     except Exception as e:
@@ -278,52 +213,9 @@ def display_internship_card(job, key_suffix, applied_titles):
         if not already_applied:
             if st.button("Apply Now", key=f"apply_{key_suffix}", type="primary"):
                 try:
-                    engine = db()
-                    # Check if it's PostgreSQL or SQLite based on engine URL
-                    if 'postgresql' in str(engine.url):
-                        with engine.connect() as conn:
-                            conn.execute(text("""
-                                INSERT INTO applications (username, job_title, company, location)
-                                VALUES (:username, :job_title, :company, :location)
-                            """), {
-                                "username": current_user(),
-                                "job_title": job["title"],
-                                "company": job["company"],
-                                "location": job["location"]
-                            })
-                            conn.commit()
-                    else:  # SQLite
-                        with engine.connect() as conn:
-                            conn.execute(text("""
-                                INSERT INTO applications (username, job_title, company, location)
-                                VALUES (:username, :job_title, :company, :location)
-                            """), {
-                                "username": current_user(),
-                                "job_title": job["title"],
-                                "company": job["company"],
-                                "location": job["location"]
-                            })
-                            conn.commit()
+                    apply_to(job)
 
                     st.success("Applied successfully!")
-                    # Refresh applied titles cache
-                    try:
-                        engine = db()
-                        if 'postgresql' in str(engine.url):
-                            applied_jobs = pd.read_sql("""
-                                SELECT DISTINCT job_title
-                                FROM applications
-                                WHERE LOWER(username)=%(username)s
-                            """, engine, params={'username': current_user()})
-                        else:
-                            applied_jobs = pd.read_sql_query("""
-                                SELECT DISTINCT job_title
-                                FROM applications
-                                WHERE LOWER(username)=LOWER(?)
-                            """, engine, params=(current_user(),))
-                        st.session_state.applied_titles_cache = applied_jobs['job_title'].str.lower().tolist() if not applied_jobs.empty else []
-                    except:
-                        pass
                     st.rerun()
                 except Exception as e:
                     st.error(f"Application failed: {e}")
@@ -363,52 +255,9 @@ def display_recommendation_card(rec, idx, applied_titles):
         if not already_applied:
             if st.button("Apply Now", key=f"rec_apply_{idx}", type="primary"):
                 try:
-                    engine = db()
-                    # Check if it's PostgreSQL or SQLite based on engine URL
-                    if 'postgresql' in str(engine.url):
-                        with engine.connect() as conn:
-                            conn.execute(text("""
-                                INSERT INTO applications (username, job_title, company, location)
-                                VALUES (:username, :job_title, :company, :location)
-                            """), {
-                                "username": current_user(),
-                                "job_title": rec["title"],
-                                "company": rec["company"],
-                                "location": rec["location"]
-                            })
-                            conn.commit()
-                    else:  # SQLite
-                        with engine.connect() as conn:
-                            conn.execute(text("""
-                                INSERT INTO applications (username, job_title, company, location)
-                                VALUES (:username, :job_title, :company, :location)
-                            """), {
-                                "username": current_user(),
-                                "job_title": rec["title"],
-                                "company": rec["company"],
-                                "location": rec["location"]
-                            })
-                            conn.commit()
+                    apply_to(rec)
 
                     st.success("Applied successfully!")
-                    # Refresh applied titles cache
-                    try:
-                        engine = db()
-                        if 'postgresql' in str(engine.url):
-                            applied_jobs = pd.read_sql("""
-                                SELECT DISTINCT job_title
-                                FROM applications
-                                WHERE LOWER(username)=%(username)s
-                            """, engine, params={'username': current_user()})
-                        else:
-                            applied_jobs = pd.read_sql_query("""
-                                SELECT DISTINCT job_title
-                                FROM applications
-                                WHERE LOWER(username)=LOWER(?)
-                            """, engine, params=(current_user(),))
-                        st.session_state.applied_titles_cache = applied_jobs['job_title'].str.lower().tolist() if not applied_jobs.empty else []
-                    except:
-                        pass
                     st.rerun()
                 except Exception as e:
                     st.error(f"Application failed: {e}")
@@ -748,7 +597,17 @@ def main():
             def load_data():
                 return preprocess_data()
 
+            @st.cache_resource
+            def load_search_engine():
+                return SearchEngine(load_data())
+
+            @st.cache_resource
+            def load_typeahead():
+                return Typeahead(load_data())
+
             df = load_data()
+            search_engine = load_search_engine()
+            typeahead = load_typeahead()
             from src.recommender import get_personalized_recommendations
 
             # Navigation using radio buttons for programmatic control
@@ -766,74 +625,25 @@ def main():
                     st.session_state.resume_skills = parse_resume(pdf)
 
                 skill = st.text_input("Skills", value=", ".join(st.session_state.resume_skills))
-                city = st.selectbox("Preferred City", ["All"] + sorted(df["location"].dropna().unique()))
+                last_term = skill.split(",")[-1].strip()
+                if last_term:
+                    suggestions = [s for s in typeahead.skills.suggest(last_term) if s.lower() != last_term.lower()]
+                    if suggestions:
+                        st.caption("💡 Suggestions: " + ", ".join(suggestions))
+                city = st.selectbox("Preferred City", ["All"] + typeahead.cities)
+                ranking = st.radio("Rank results by", ["Best Match", "Stipend & Company"], horizontal=True)
 
                 # Initialize search state in session
                 if 'search_performed' not in st.session_state:
                     st.session_state.search_performed = False
                 if 'search_results' not in st.session_state:
-                    st.session_state.search_results = pd.DataFrame()
-                if 'applied_titles_cache' not in st.session_state:
-                    st.session_state.applied_titles_cache = []
-
-                # Show internships by default, filtered by search criteria
-                keywords = [k.strip().lower() for k in skill.split(",") if k.strip()]
-                results = df if not keywords else df[
-                    df["description"].str.lower().apply(lambda x: any(k in x for k in keywords))
-                ]
-                if city != "All":
-                    results = results[results["location"].str.contains(city, case=False)]
-
-                # Get list of already applied job titles for this user
-                try:
-                    engine = db()
-                    if 'postgresql' in str(engine.url):
-                        applied_jobs = pd.read_sql("""
-                            SELECT DISTINCT job_title
-                            FROM applications
-                            WHERE LOWER(username)=%(username)s
-                        """, engine, params={'username': current_user()})
-                    else:  # SQLite
-                        applied_jobs = pd.read_sql_query("""
-                            SELECT DISTINCT job_title
-                            FROM applications
-                            WHERE LOWER(username)=LOWER(?)
-                        """, engine, params=(current_user(),))
-
-                    applied_titles = applied_jobs['job_title'].str.lower().tolist() if not applied_jobs.empty else []
-                    st.session_state.applied_titles_cache = applied_titles
-                except:
-                    applied_titles = st.session_state.applied_titles_cache
-
-                results = results.copy()
-                # Enhanced scoring for search results including skill matching
-                user_skills = st.session_state.resume_skills if st.session_state.resume_skills else []
-
-                def calculate_search_score(row):
-                    base_score = row["stipend"] * 0.01 + row["company_score"] * 10 + row["is_remote"] * 5
+                    st.session_state.search_results = SearchResults.empty()
 
-                    # Add skill matching score if user has skills
-                    skill_score = 0
-                    if user_skills and pd.notna(row.get('skills_required')):
-                        job_skills = set(str(row['skills_required']).split(', '))
-                        matched_skills = len(set(user_skills).intersection(job_skills))
-                        total_job_skills = len(job_skills)
-                        if total_job_skills > 0:
-                            skill_score = (matched_skills / total_job_skills) * 50  # Up to 50 points for perfect skill match
+                # Titles this user already applied to (cached for the session)
+                applied = applied_titles()
 
-                    return base_score + skill_score
-
-                results["score"] = results.apply(calculate_search_score, axis=1)
-                results["skill_score"] = results.apply(
-                    lambda row: round(calculate_skill_score_only(row, user_skills), 2) if user_skills else 0,
-                    axis=1
-                )
-
-                # Filter out already applied internships
-                results = results[~results["title"].str.lower().isin(applied_titles)]
-
-                # Show top internships
-                results = results.sort_values("score", ascending=False)
+                # Skill matching uses the skills extracted from the resume
+                user_skills = st.session_state.resume_skills if st.session_state.resume_skills else []
 
                 # Handle search button click
                 search_clicked = st.button("🔎 Find Internships", key="search_button")
@@ -844,68 +654,30 @@ def main():
                         st.session_state.search_performed = True
                         st.session_state.current_page = 0
 
-                        # Store search history
-                        try:
-                            engine = db()
-                            if 'postgresql' in str(engine.url):
-                                with engine.connect() as conn:
-                                    conn.execute(text("""
-                                        INSERT INTO search_history (username, skill, city)
-                                        VALUES (:username, :skill, :city)
-                                    """), {"username": current_user(), "skill": skill, "city": city})
-                                    conn.commit()
-                            else:
-                                with engine.connect() as conn:
-                                    conn.execute(text("""
-                                        INSERT INTO search_history (username, skill, city)
-                                        VALUES (:username, :skill, :city)
-                                    """), {"username": current_user(), "skill": skill, "city": city})
-                                    conn.commit()
-                        except:
-                            pass  # Ignore if db fails
-
-                        # Perform the search
-                        keywords = [k.strip().lower() for k in skill.split(",") if k.strip()]
-                        results = df if not keywords else df[
-                            df["description"].str.lower().apply(lambda x: any(k in x for k in keywords))
-                        ]
-                        if city != "All":
-                            results = results[results["location"].str.contains(city, case=False)]
-
-                        # Enhanced scoring for search results including skill matching
-                        user_skills = st.session_state.resume_skills if st.session_state.resume_skills else []
-
-                        def calculate_search_score(row):
-                            base_score = row["stipend"] * 0.01 + row["company_score"] * 10 + row["is_remote"] * 5
-
-                            # Add skill matching score if user has skills
-                            skill_score = 0
-                            if user_skills and pd.notna(row.get('skills_required')):
-                                job_skills = set(str(row['skills_required']).split(', '))
-                                matched_skills = len(set(user_skills).intersection(job_skills))
-                                total_job_skills = len(job_skills)
-                                if total_job_skills > 0:
-                                    skill_score = (matched_skills / total_job_skills) * 50  # Up to 50 points for perfect skill match
-
-                            return base_score + skill_score
-
-                        results = results.copy()
-                        results["score"] = results.apply(calculate_search_score, axis=1)
-                        results["skill_score"] = results.apply(
-                            lambda row: round(calculate_skill_score_only(row, user_skills), 2) if user_skills else 0,
-                            axis=1
-                        )
-
-                        # Filter out already applied internships
-                        results = results[~results["title"].str.lower().isin(applied_titles)]
+                        # Store search history (written in the background)
+                        log_search(current_user(), skill, city)
 
-                        # Store results in session state
-                        st.session_state.search_results = results.sort_values("score", ascending=False)
+                        # Perform the search and store results
+                        st.session_state.search_results = search_engine.search(
+                            skill, city, user_skills, applied,
+                            ranking="bm25" if ranking == "Best Match" else "business"
+                        )
+                        st.session_state.search_results_filtered = bool(applied)  # Exclusions make a private copy
+                        st.session_state.search_corrections = {
+                            k: v for k, v in search_engine.corrections(skill).items() if k != v
+                        }
 
                     # Use stored results for display
                     display_results = st.session_state.search_results
 
                     st.markdown(f"<h3>🎯 Found {len(display_results)} internships matching your criteria</h3>", unsafe_allow_html=True)
+                    if st.session_state.get("search_corrections"):
+                        st.caption("🔤 Showing results for " + ", ".join(
+                            f"'{v}' (instead of '{k}')" for k, v in st.session_state.search_corrections.items()
+                        ))
+                    state_caption = search_state_caption()
+                    if state_caption:
+                        st.caption(state_caption)
 
                     # Pagination setup
                     items_per_page = 10
@@ -923,10 +695,11 @@ def main():
                     # Display internships for current page
                     start_idx = st.session_state.current_page * items_per_page
                     end_idx = start_idx + items_per_page
-                    page_results = display_results.iloc[start_idx:end_idx]
+                    # Only the rows of the visible page are read from the shared dataset
+                    page_results = display_results.rows(search_engine.df, start_idx, end_idx)
 
                     for counter, (i, j) in enumerate(page_results.iterrows()):
-                        display_internship_card(j, f"job_{st.session_state.current_page}_{counter}", st.session_state.applied_titles_cache)
+                        display_internship_card(j, f"job_{st.session_state.current_page}_{counter}", applied)
 
                     # Pagination controls at the bottom
                     if total_pages > 1:
@@ -975,7 +748,7 @@ def main():
 
                 with col1:
                     pref_location = st.selectbox("Preferred Location",
-                                               ["Any"] + sorted(df["location"].dropna().unique()),
+                                               ["Any"] + typeahead.cities,
                                                key="pref_location")
                     pref_domain = st.selectbox("Preferred Domain",
                                              ["Any", "Technology", "Finance", "Marketing", "HR", "Operations"],
@@ -996,56 +769,14 @@ def main():
 
                 # Get applications history for collaborative filtering
                 try:
-                    engine = db()
-                    if 'postgresql' in str(engine.url):
-                        user_apps = pd.read_sql("""
-                            SELECT job_title, company, location
-                            FROM applications
-                            WHERE LOWER(username)=%(username)s
-                        """, engine, params={'username': current_user()})
-                    else:
-                        user_apps = pd.read_sql_query("""
-                            SELECT job_title, company, location
-                            FROM applications
-                            WHERE LOWER(username)=LOWER(?)
-                        """, engine, params=(current_user(),))
+                    user_apps = application_repo.for_user(current_user())
                 except:
                     user_apps = pd.DataFrame()
 
                 if st.button("🎯 Get AI Recommendations", type="primary"):
-                    # Store recommendation history
-                    try:
-                        engine = db()
-                        if 'postgresql' in str(engine.url):
-                            with engine.connect() as conn:
-                                conn.execute(text("""
-                                    INSERT INTO recommendation_history (username, pref_location, pref_domain, min_stipend, remote_pref, experience_level)
-                                    VALUES (:username, :pref_location, :pref_domain, :min_stipend, :remote_pref, :experience_level)
-                                """), {
-                                    "username": current_user(),
-                                    "pref_location": pref_location,
-                                    "pref_domain": pref_domain,
-                                    "min_stipend": min_stipend,
-                                    "remote_pref": remote_pref,
-                                    "experience_level": experience_level
-                                })
-                                conn.commit()
-                        else:
-                            with engine.connect() as conn:
-                                conn.execute(text("""
-                                    INSERT INTO recommendation_history (username, pref_location, pref_domain, min_stipend, remote_pref, experience_level)
-                                    VALUES (:username, :pref_location, :pref_domain, :min_stipend, :remote_pref, :experience_level)
-                                """), {
-                                    "username": current_user(),
-                                    "pref_location": pref_location,
-                                    "pref_domain": pref_domain,
-                                    "min_stipend": min_stipend,
-                                    "remote_pref": remote_pref,
-                                    "experience_level": experience_level
-                                })
-                                conn.commit()
-                    except:
-                        pass  # Ignore if db fails
+                    # Store recommendation history (written in the background)
+                    log_recommendation(current_user(), pref_location, pref_domain,
+                                       min_stipend, remote_pref, experience_level)
 
                     with st.spinner("🤖 Analyzing your profile and finding best matches..."):
                         # Create user profile
@@ -1066,26 +797,7 @@ def main():
                         if not recommendations.empty:
                             st.success(f"🎉 Found {len(recommendations)} personalized recommendations!")
 
-                            # Get applied titles for recommendations
-                            try:
-                                engine = db()
-                                if 'postgresql' in str(engine.url):
-                                    applied_jobs = pd.read_sql("""
-                                        SELECT DISTINCT job_title
-                                        FROM applications
-                                        WHERE LOWER(username)=%(username)s
-                                    """, engine, params={'username': current_user()})
-                                else:
-                                    applied_jobs = pd.read_sql_query("""
-                                        SELECT DISTINCT job_title
-                                        FROM applications
-                                        WHERE LOWER(username)=LOWER(?)
-                                    """, engine, params=(current_user(),))
-
-                                applied_titles = applied_jobs['job_title'].str.lower().tolist() if not applied_jobs.empty else []
-                                st.session_state.applied_titles_cache = applied_titles
-                            except:
-                                applied_titles = st.session_state.applied_titles_cache if 'applied_titles_cache' in st.session_state else []
+                            applied = applied_titles()
 
                             # Pagination for recommendations
                             rec_items_per_page = 10
@@ -1106,7 +818,7 @@ def main():
                             page_recommendations = recommendations.iloc[rec_start_idx:rec_end_idx]
 
                             for counter, (idx, rec) in enumerate(page_recommendations.iterrows()):
-                                display_recommendation_card(rec, f"rec_{st.session_state.rec_current_page}_{counter}", applied_titles)
+                                display_recommendation_card(rec, f"rec_{st.session_state.rec_current_page}_{counter}", applied)
 
                             # Pagination controls at the bottom for recommendations
                             if rec_total_pages > 1:
@@ -1150,55 +862,26 @@ def main():
 
                 st.markdown("<div class='card'>", unsafe_allow_html=True)
                 try:
-                    engine = db()
-                    # Check if it's PostgreSQL or SQLite based on engine URL
-                    if 'postgresql' in str(engine.url):
-                        apps = pd.read_sql("""
-                            SELECT job_title, company, location, applied_at
-                            FROM applications
-                            WHERE LOWER(username)=%(username)s
-                            ORDER BY applied_at DESC
-                        """, engine, params={'username': current_user()})
-                    else:  # SQLite
-                        with engine.connect() as conn:
-                            cur = conn.connection.cursor()
-                            cur.execute("PRAGMA table_info(applications)")
-                            columns = [col[1] for col in cur.fetchall()]
-
-                            if 'job_title' in columns:
-                                apps = pd.read_sql_query("""
-                                    SELECT job_title, company, location, applied_at
-                                FROM applications
-                                WHERE LOWER(username)=LOWER(?)
-                                ORDER BY applied_at DESC
-                            """, engine, params=(current_user(),))
-                            else:
-                                # Use existing schema
-                                apps = pd.read_sql_query("""
-                                    SELECT job_id as job_title, 'Applied' as company, '' as location, id as applied_at
-                                FROM applications
-                                WHERE LOWER(username)=LOWER(?)
-                                ORDER BY id DESC
-                            """, engine, params=(current_user(),))
+                    total_applied, companies_applied, latest_applied = application_summary()
+                    apps, next_cursor = history_page("applications", application_repo.history)
                 except Exception as e:
                     st.error(f"Failed to load applications: {e}")
-                    apps = pd.DataFrame()  # Empty dataframe as fallback
+                    total_applied = 0
 
-                if not apps.empty:
-                    st.markdown(f"<h3>📋 Your Applications ({len(apps)} total)</h3>", unsafe_allow_html=True)
+                if total_applied:
+                    st.markdown(f"<h3>📋 Your Applications ({total_applied} total)</h3>", unsafe_allow_html=True)
                     st.dataframe(apps, width='stretch')
+                    history_pager("applications", next_cursor)
 
                     # Application statistics
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Total Applied", len(apps))
+                        st.metric("Total Applied", total_applied)
                     with col2:
-                        unique_companies = apps['company'].nunique()
-                        st.metric("Companies Applied To", unique_companies)
+                        st.metric("Companies Applied To", companies_applied)
                     with col3:
-                        if 'applied_at' in apps.columns:
-                            latest_app = pd.to_datetime(apps['applied_at']).max()
-                            st.metric("Last Application", latest_app.strftime('%Y-%m-%d'))
+                        if latest_applied is not None:
+                            st.metric("Last Application", pd.to_datetime(latest_applied).strftime('%Y-%m-%d'))
                 else:
                     st.info("📝 You haven't applied to any internships yet. Start exploring opportunities!")
 
@@ -1221,57 +904,35 @@ def main():
                 # Search History
                 st.markdown("#### 🔍 Search History")
                 try:
-                    engine = db()
-                    if 'postgresql' in str(engine.url):
-                        search_history = pd.read_sql("""
-                            SELECT skill, city, timestamp
-                            FROM search_history
-                            WHERE LOWER(username)=%(username)s
-                            ORDER BY timestamp DESC
-                        """, engine, params={'username': current_user()})
-                    else:
-                        search_history = pd.read_sql_query("""
-                            SELECT skill, city, timestamp
-                            FROM search_history
-                            WHERE LOWER(username)=LOWER(?)
-                            ORDER BY timestamp DESC
-                        """, engine, params=(current_user(),))
+                    search_history, next_cursor = history_page("search_history", history_repo.searches)
                 except:
-                    search_history = pd.DataFrame()
+                    search_history, next_cursor = pd.DataFrame(), None
 
                 if not search_history.empty:
                     st.dataframe(search_history, width='stretch')
+                    history_pager("search_history", next_cursor)
                 else:
                     st.info("No search history found.")
 
+                show_archived_history("search_history", "📦 Older searches (weekly summary)")
+
                 st.markdown("---")
 
                 # Recommendation History
                 st.markdown("#### 🎯 Recommendation History")
                 try:
-                    engine = db()
-                    if 'postgresql' in str(engine.url):
-                        rec_history = pd.read_sql("""
-                            SELECT pref_location, pref_domain, min_stipend, remote_pref, experience_level, timestamp
-                            FROM recommendation_history
-                            WHERE LOWER(username)=%(username)s
-                            ORDER BY timestamp DESC
-                        """, engine, params={'username': current_user()})
-                    else:
-                        rec_history = pd.read_sql_query("""
-                            SELECT pref_location, pref_domain, min_stipend, remote_pref, experience_level, timestamp
-                            FROM recommendation_history
-                            WHERE LOWER(username)=LOWER(?)
-                            ORDER BY timestamp DESC
-                        """, engine, params=(current_user(),))
+                    rec_history, next_cursor = history_page("rec_history", history_repo.recommendations)
                 except:
-                    rec_history = pd.DataFrame()
+                    rec_history, next_cursor = pd.DataFrame(), None
 
                 if not rec_history.empty:
                     st.dataframe(rec_history, width='stretch')
+                    history_pager("rec_history", next_cursor)
                 else:
                     st.info("No recommendation history found.")
 
+                show_archived_history("recommendation_history", "📦 Older recommendation requests (weekly summary)")
+
                 st.markdown("</div>", unsafe_allow_html=True)
 
         # ================= ADMIN =================
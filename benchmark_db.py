@@ -0,0 +1,116 @@
+"""
+Per-request database latency: engine per call vs pooled singleton
+==================================================================
+
+Replays the app's most frequent query (the applied-titles lookup) the way
+db() used to serve it - a new engine plus a SELECT 1 probe on every call -
+and through the shared pooled engine from src/database.py.
+
+Usage:
+    python benchmark_db.py                                  # temporary SQLite file
+    python benchmark_db.py --url "postgresql://user:pw@localhost:5432/app?sslmode=disable"
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from src.database import create_pooled_engine
+
+APPLIED_TITLES = text("""
+    SELECT DISTINCT job_title
+    FROM applications
+    WHERE LOWER(username)=:username
+""")
+
+def prepare(url, rows):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS applications"))
+        conn.execute(text("""
+            CREATE TABLE applications (
+                id INTEGER PRIMARY KEY,
+                username TEXT,
+                job_title TEXT,
+                company TEXT,
+                location TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text("""
+            INSERT INTO applications (id, username, job_title, company, location)
+            VALUES (:id, :username, :job_title, :company, :location)
+        """), [{
+            "id": i,
+            "username": f"student{i % 50}",
+            "job_title": f"Intern {i % 200}",
+            "company": f"Company {i % 30}",
+            "location": "Bangalore"
+        } for i in range(rows)])
+        conn.commit()
+    engine.dispose()
+
+def legacy_request(url):
+    # What every db() call used to do
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    with engine.connect() as conn:
+        return conn.execute(APPLIED_TITLES, {"username": "student7"}).fetchall()
+
+def pooled_request(engine):
+    with engine.connect() as conn:
+        return conn.execute(APPLIED_TITLES, {"username": "student7"}).fetchall()
+
+def measure(fn, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (defaults to a temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    tmp_path = None
+    url = args.url
+    if not url:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    try:
+        prepare(url, args.rows)
+
+        legacy = measure(lambda: legacy_request(url), args.requests)
+
+        engine = create_pooled_engine(url)
+        pooled_request(engine)  # Warm the pool
+        pooled = measure(lambda: pooled_request(engine), args.requests)
+        engine.dispose()
+
+        print(f"Database: {url.split('@')[-1]}  ({args.requests} requests, {args.rows} applications)")
+        print(f"{'':<22}{'mean':>10}{'p50':>10}{'p95':>10}")
+        for name, result in [("engine per call", legacy), ("pooled singleton", pooled)]:
+            print(f"{name:<22}{result['mean_ms']:>8}ms{result['p50_ms']:>8}ms{result['p95_ms']:>8}ms")
+        print(f"Speedup (mean): {legacy['mean_ms'] / pooled['mean_ms']:.1f}x")
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+History retention job
+=====================
+
+Folds search and recommendation history older than the retention window
+into the per-user weekly summary tables and deletes the raw rows in
+batches, keeping the tables behind "My History" small. Run it daily.
+
+Usage:
+    python compact_history.py                 # HISTORY_RETENTION_DAYS (default 90)
+    python compact_history.py --days 30 --batch 2000
+"""
+
+import argparse
+
+from src.repositories import HISTORY_RETENTION_DAYS, RETENTION_BATCH, retention_repo
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=HISTORY_RETENTION_DAYS, help="Keep raw rows this many days")
+    parser.add_argument("--batch", type=int, default=RETENTION_BATCH, help="Rows archived per transaction")
+    args = parser.parse_args()
+
+    for table, removed in retention_repo.compact_all(args.days, args.batch).items():
+        print(f"{table}: compacted {removed} rows older than {args.days} days")
+
+if __name__ == "__main__":
+    main()
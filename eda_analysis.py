@@ -13,6 +13,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import warnings
+from src.skills import SkillMatrix
 warnings.filterwarnings('ignore')
 
 # Try to import optional libraries
@@ -46,8 +47,16 @@ class InternshipEDA:
         """Initialize EDA with dataset path"""
         self.data_path = data_path
         self.df = None
+        self._skill_matrix = None
         self.load_data()
 
+    @property
+    def skill_matrix(self):
+        """Posting x skill matrix shared by every skills statistic, built on first use"""
+        if self._skill_matrix is None:
+            self._skill_matrix = SkillMatrix.from_frame(self.df)
+        return self._skill_matrix
+
     def load_data(self):
         """Load and perform initial data cleaning"""
         try:
@@ -203,14 +212,8 @@ class InternshipEDA:
         print("🛠️  SKILLS ANALYSIS")
         print("="*60)
 
-        # Split skills and count frequency
-        all_skills = []
-        for skills_str in self.df['skills_required'].dropna():
-            if isinstance(skills_str, str):
-                skills = [skill.strip() for skill in skills_str.split(',')]
-                all_skills.extend(skills)
-
-        skill_counts = pd.Series(all_skills).value_counts()
+        # Skill frequency
+        skill_counts = self.skill_matrix.counts()
 
         print(f"\n📊 Total unique skills mentioned: {len(skill_counts)}")
         print("\n🔝 Top 20 Most In-Demand Skills:")
@@ -350,13 +353,7 @@ class InternshipEDA:
             return
 
         # Skills frequency chart
-        all_skills = []
-        for skills_str in self.df['skills_required'].dropna():
-            if isinstance(skills_str, str):
-                skills = [skill.strip() for skill in skills_str.split(',')]
-                all_skills.extend(skills)
-
-        skill_counts = pd.Series(all_skills).value_counts().head(20)
+        skill_counts = self.skill_matrix.counts(20)
 
         fig_skills = px.bar(skill_counts,
                            title='Top 20 Most In-Demand Skills',
@@ -397,12 +394,7 @@ class InternshipEDA:
         print(f"   • Most common category: {self.df['category'].value_counts().index[0]}")
 
         # Skills insights
-        all_skills = []
-        for skills_str in self.df['skills_required'].dropna():
-            if isinstance(skills_str, str):
-                skills = [skill.strip() for skill in skills_str.split(',')]
-                all_skills.extend(skills)
-        skill_counts = pd.Series(all_skills).value_counts()
+        skill_counts = self.skill_matrix.counts()
         print(f"   • Most in-demand skill: {skill_counts.index[0]}")
 
         print("\n📊 ANALYSIS COMPLETED!")
@@ -0,0 +1,39 @@
+"""
+Application rollup refresh job
+==============================
+
+Folds applications added since the last run into the daily company,
+location and title rollup tables that back the admin dashboard. The admin
+page refreshes at most once a minute; run this on a schedule so the
+rollups stay current and that refresh stays cheap. Applications younger
+than ROLLUP_SETTLE_SECONDS are picked up by a later run.
+
+Usage:
+    python refresh_rollups.py                 # one refresh
+    python refresh_rollups.py --interval 60   # refresh every minute until stopped
+"""
+
+import argparse
+import time
+
+from src.repositories import rollup_repo
+
+def refresh():
+    low, high = rollup_repo.refresh()
+    if high > low:
+        print(f"Rolled up applications {low + 1}-{high}")
+    else:
+        print(f"Rollups up to date (last application id {high})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, help="Seconds between refreshes; omit to run once")
+    args = parser.parse_args()
+
+    refresh()
+    while args.interval:
+        time.sleep(args.interval)
+        refresh()
+
+if __name__ == "__main__":
+    main()
@@ -4,33 +4,113 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import psycopg2
-from sqlalchemy import create_engine, text
-from .preprocess import preprocess_data
-from .demand_model import train_advanced_model
+from .repositories import application_repo, rollup_repo
+from .plot_sampling import downsample, histogram
+from .preprocess import dataset_fingerprint, preprocess_data
+from .skills import SkillMatrix
+from .demand_model import model_artifact, model_artifact_path
+import os
 import numpy as np
 
-def db():
-    # Completely safe database connection - no Streamlit calls during import
+ADMIN_VIEWS = ["📈 Overview", "🏢 Company Analysis", "📍 Location Trends", "🎯 Skills Demand", "🤖 ML Insights"]
+
+# Seconds an application aggregate may be served; bounds staleness when reads come from a lagging replica
+APPLICATION_AGGREGATE_TTL = 600
+
+# The dashboard folds new applications into the rollups at most this often;
+# refresh_rollups.py keeps them current in between
+ROLLUP_REFRESH_INTERVAL = 60
+
+@st.cache_data(show_spinner=False)
+def load_dataset():
+    """Preprocessed internships and their fingerprint, loaded once per process"""
+    df = preprocess_data()
+    return df, dataset_fingerprint(df)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def market_aggregates(fingerprint, _df):
+    """
+    Summary tables for the overview, company, location and skills tabs
+
+    Cached by dataset fingerprint and shared by every admin session, so
+    reruns and tab switches don't recompute them over the full frame.
+    """
+    df = _df
+    skills = SkillMatrix.from_frame(df)
+
+    return {
+        'internships': len(df),
+        'avg_stipend': df['stipend'].mean(),
+        'remote_count': int(df['is_remote'].sum()),
+        'company_counts': df['company'].value_counts().head(10),
+        'company_stats': df.groupby('company').agg({
+            'applications_count': 'mean',
+            'company_score': 'first',
+            'stipend': 'mean'
+        }).reset_index(),
+        'location_counts': df['location'].value_counts().head(10),
+        'remote_stats': df['is_remote'].value_counts(),
+        'location_stipend': df.groupby('location')['stipend'].mean().sort_values(ascending=False).head(10),
+        'skill_counts': skills.counts(15),
+        'skill_diversity': skills.unique_per_group(df['category']).sort_values(ascending=False, kind='stable'),
+        'skill_cooccurrence': skills.cooccurrence(15),
+        'demand_histogram': histogram(df['applications_count']),
+        'stipend_points': len(df),
+        'stipend_sample': downsample(df[['stipend', 'applications_count', 'company_score', 'is_remote']],
+                                     'stipend', 'applications_count', strata='is_remote')
+    }
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=APPLICATION_AGGREGATE_TTL)
+def application_aggregates(high_water_mark, legacy):
+    """
+    Application charts as of an applications.id high-water mark
+
+    New applications raise the mark, so the cache only misses after
+    someone applies; otherwise every admin rerun is served from memory.
+    """
+    if legacy:
+        # Old SQLite schema has no columns to roll up; aggregate the table directly
+        return {
+            'total': application_repo.count(),
+            'companies': application_repo.top_companies(10),
+            'locations': application_repo.top_locations(10),
+            'titles': pd.Series(dtype='int64', name='count'),
+            'daily': pd.DataFrame()
+        }
+    return {
+        'total': rollup_repo.total(),
+        'companies': rollup_repo.top('company', 10),
+        'locations': rollup_repo.top('location', 10),
+        'titles': rollup_repo.top('title', 10),
+        'daily': rollup_repo.daily()
+    }
+
+@st.cache_resource(show_spinner="Training demand model...", max_entries=2)
+def trained_model(fingerprint, _df):
+    """
+    Demand model artifact for a dataset version, shared by all admin sessions;
+    loaded from disk if an earlier run already trained it
+    """
+    return model_artifact(_df, fingerprint, target_column='applications_count', model_type='rf')
+
+@st.cache_data(show_spinner=False, ttl=ROLLUP_REFRESH_INTERVAL)
+def rollup_mark():
+    """Rollup high-water mark, refreshing the rollups once per interval for all admin sessions"""
+    return rollup_repo.refresh()[1]
+
+def sample_caption(shown, total):
+    if shown < total:
+        st.caption(f"Showing {shown:,} of {total:,} points: a stratified sample with outliers kept")
+
+def load_application_aggregates():
+    """Application chart data as of the current rollup mark; None if unavailable"""
     try:
-        # Only try PostgreSQL if we're in a proper Streamlit runtime context
-        import streamlit as st
-        if hasattr(st, 'runtime') and st.runtime.exists():
-            try:
-                if hasattr(st, 'secrets') and 'db' in st.secrets and 'url' in st.secrets['db']:
-                    from sqlalchemy import create_engine, text
-                    engine = create_engine(st.secrets["db"]["url"])
-                    # Test the connection
-                    with engine.connect() as conn:
-                        conn.execute(text("SELECT 1"))
-                    return engine
-            except:
-                pass  # Fall through to SQLite
-    except:
-        pass  # Not in Streamlit context
-
-    # Always fallback to local SQLite for development/safety
-    from sqlalchemy import create_engine
-    return create_engine("sqlite:///users.db")
+        legacy = application_repo.is_legacy()
+        mark = application_repo.high_water_mark() if legacy else rollup_mark()
+        return application_aggregates(mark, legacy)
+    except Exception as e:
+        st.warning(f"Could not load applications data: {e}")
+        return None
 
 def show_admin_dashboard():
     # Back button to return to main dashboard
@@ -43,133 +123,108 @@ def show_admin_dashboard():
         st.title("📊 Admin Dashboard – Internship Analytics")
 
     # Load and preprocess data
-    df = preprocess_data()
-
-    # Load applications data
-    try:
-        engine = db()
-        if 'postgresql' in str(engine.url):
-            apps = pd.read_sql("""
-                SELECT job_title, company, location, applied_at, username
-                FROM applications
-                ORDER BY applied_at DESC
-            """, engine)
-        else:  # SQLite - check schema and adapt
-            with engine.connect() as conn:
-                cur = conn.connection.cursor()
-                cur.execute("PRAGMA table_info(applications)")
-                columns = [col[1] for col in cur.fetchall()]
-
-                if 'job_title' in columns:
-                    apps = pd.read_sql_query("""
-                        SELECT job_title, company, location, applied_at, username
-                        FROM applications
-                        ORDER BY applied_at DESC
-                    """, engine)
-                else:
-                    # Use existing schema
-                    apps = pd.read_sql_query("""
-                        SELECT job_id as job_title, status as company, '' as location, id as applied_at, username
-                        FROM applications
-                        ORDER BY id DESC
-                    """, engine)
-    except Exception as e:
-        st.warning(f"Could not load applications data: {e}")
-        apps = pd.DataFrame()
-
-    # Create tabs for different analytics views
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📈 Overview", "🏢 Company Analysis", "📍 Location Trends",
-        "🎯 Skills Demand", "🤖 ML Insights"
-    ])
-
-    with tab1:
-        show_overview_dashboard(df, apps)
-
-    with tab2:
-        show_company_analysis(df, apps)
-
-    with tab3:
-        show_location_analysis(df, apps)
-
-    with tab4:
-        show_skills_analysis(df)
-
-    with tab5:
-        show_ml_insights(df)
+    df, fingerprint = load_dataset()
+
+    # Only the selected view is computed; st.tabs would run every tab body on each rerun
+    view = st.radio("Analytics view", ADMIN_VIEWS, key="admin_view",
+                    horizontal=True, label_visibility="collapsed")
+
+    if view == "📈 Overview":
+        show_overview_dashboard(market_aggregates(fingerprint, df), load_application_aggregates())
+    elif view == "🏢 Company Analysis":
+        show_company_analysis(market_aggregates(fingerprint, df), load_application_aggregates())
+    elif view == "📍 Location Trends":
+        show_location_analysis(market_aggregates(fingerprint, df), load_application_aggregates())
+    elif view == "🎯 Skills Demand":
+        show_skills_analysis(market_aggregates(fingerprint, df))
+    else:
+        show_ml_insights(df, fingerprint)
 
-def show_overview_dashboard(df, apps):
+def show_overview_dashboard(market, apps):
     st.header("📈 Internship Market Overview")
 
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Internships", len(df))
+        st.metric("Total Internships", market['internships'])
 
     with col2:
-        avg_stipend = df['stipend'].mean()
-        st.metric("Average Stipend", f"₹{avg_stipend:,.0f}")
+        st.metric("Average Stipend", f"₹{market['avg_stipend']:,.0f}")
 
     with col3:
-        remote_count = df['is_remote'].sum()
-        st.metric("Remote Opportunities", remote_count)
+        st.metric("Remote Opportunities", market['remote_count'])
 
     with col4:
-        if not apps.empty:
-            total_applications = len(apps)
-            st.metric("Total Applications", total_applications)
+        if apps and apps['total']:
+            st.metric("Total Applications", apps['total'])
         else:
             st.metric("Total Applications", "N/A")
 
     # Demand distribution
     st.subheader("Demand Distribution")
-    fig = px.histogram(df, x='applications_count',
-                      title="Distribution of Applications per Internship",
-                      labels={'applications_count': 'Number of Applications'})
+    fig = px.bar(market['demand_histogram'], x='center', y='count',
+                title="Distribution of Applications per Internship",
+                labels={'center': 'Number of Applications', 'count': 'Internships'})
+    fig.update_layout(bargap=0)
     st.plotly_chart(fig, use_container_width=True)
 
+    # Applications submitted per day
+    if apps and not apps['daily'].empty:
+        st.subheader("Applications Over Time")
+        fig = px.line(apps['daily'], x='day', y='count',
+                     title="Applications per Day",
+                     labels={'day': 'Date', 'count': 'Applications'})
+        st.plotly_chart(fig, use_container_width=True)
+
     # Stipend vs Applications scatter plot
     st.subheader("Stipend vs Application Volume")
-    fig = px.scatter(df, x='stipend', y='applications_count',
+    points = market['stipend_sample']
+    fig = px.scatter(points, x='stipend', y='applications_count',
                     size='company_score', color='is_remote',
                     title="Stipend vs Applications (Bubble size = Company Reputation)",
                     labels={'stipend': 'Monthly Stipend (₹)', 'applications_count': 'Applications'})
     st.plotly_chart(fig, use_container_width=True)
+    sample_caption(len(points), market['stipend_points'])
 
-def show_company_analysis(df, apps):
+def show_company_analysis(market, apps):
     st.header("🏢 Company Analysis")
 
     # Top companies by internship count
     st.subheader("Top Companies by Internship Count")
-    company_counts = df['company'].value_counts().head(10)
+    company_counts = market['company_counts']
     fig = px.bar(company_counts, title="Internships by Company",
                 labels={'value': 'Number of Internships', 'index': 'Company'})
     st.plotly_chart(fig, use_container_width=True)
 
     # Company reputation vs applications
     st.subheader("Company Reputation vs Application Success")
-    company_stats = df.groupby('company').agg({
-        'applications_count': 'mean',
-        'company_score': 'first',
-        'stipend': 'mean'
-    }).reset_index()
+    company_stats = market['company_stats']
+    points = downsample(company_stats, 'company_score', 'applications_count', outlier_columns=['company_score', 'applications_count', 'stipend'])
 
-    fig = px.scatter(company_stats, x='company_score', y='applications_count',
+    fig = px.scatter(points, x='company_score', y='applications_count',
                     size='stipend', color='stipend',
                     title="Company Reputation vs Average Applications",
                     labels={'company_score': 'Company Reputation Score',
                            'applications_count': 'Average Applications'})
     st.plotly_chart(fig, use_container_width=True)
+    sample_caption(len(points), len(company_stats))
 
     # Most applied to companies
-    if not apps.empty:
+    if apps and not apps['companies'].empty:
         st.subheader("Most Popular Companies (by Applications)")
-        popular_companies = apps['company'].value_counts().head(10)
+        popular_companies = apps['companies']
         fig = px.bar(popular_companies, title="Applications by Company",
                     labels={'value': 'Number of Applications', 'index': 'Company'})
         st.plotly_chart(fig, use_container_width=True)
 
-def show_location_analysis(df, apps):
+    # Most applied to roles
+    if apps and not apps['titles'].empty:
+        st.subheader("Most Popular Roles (by Applications)")
+        fig = px.bar(apps['titles'], title="Applications by Job Title",
+                    labels={'value': 'Number of Applications', 'index': 'Job Title'})
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_location_analysis(market, apps):
     st.header("📍 Location & Regional Trends")
 
     col1, col2 = st.columns(2)
@@ -177,7 +232,7 @@ def show_location_analysis(df, apps):
     with col1:
         # Internships by location
         st.subheader("Internships by Location")
-        location_counts = df['location'].value_counts().head(10)
+        location_counts = market['location_counts']
         fig = px.pie(location_counts, values=location_counts.values,
                     names=location_counts.index, title="Internship Distribution by City")
         st.plotly_chart(fig, use_container_width=True)
@@ -185,7 +240,7 @@ def show_location_analysis(df, apps):
     with col2:
         # Remote vs On-site
         st.subheader("Remote vs On-site")
-        remote_stats = df['is_remote'].value_counts()
+        remote_stats = market['remote_stats']
         labels = ['On-site' if x == 0 else 'Remote' for x in remote_stats.index]
         fig = px.pie(values=remote_stats.values, names=labels,
                     title="Remote Work Distribution")
@@ -193,32 +248,24 @@ def show_location_analysis(df, apps):
 
     # Average stipend by location
     st.subheader("Average Stipend by Location")
-    location_stipend = df.groupby('location')['stipend'].mean().sort_values(ascending=False).head(10)
+    location_stipend = market['location_stipend']
     fig = px.bar(location_stipend, title="Average Monthly Stipend by Location",
                 labels={'value': 'Average Stipend (₹)', 'location': 'Location'})
     st.plotly_chart(fig, use_container_width=True)
 
     # Applications by location (if data available)
-    if not apps.empty:
+    if apps and not apps['locations'].empty:
         st.subheader("Application Volume by Location")
-        location_apps = apps['location'].value_counts().head(10)
+        location_apps = apps['locations']
         fig = px.bar(location_apps, title="Applications by Location",
                     labels={'value': 'Number of Applications', 'index': 'Location'})
         st.plotly_chart(fig, use_container_width=True)
 
-def show_skills_analysis(df):
+def show_skills_analysis(market):
     st.header("🎯 Skills Demand Analysis")
 
-    # Extract skills from the dataset
-    all_skills = []
-    for skills_str in df['skills_required'].dropna():
-        skills = [s.strip() for s in skills_str.split(',')]
-        all_skills.extend(skills)
-
-    if all_skills:
-        skills_df = pd.DataFrame(all_skills, columns=['skill'])
-        skill_counts = skills_df['skill'].value_counts().head(15)
-
+    skill_counts = market['skill_counts']
+    if not skill_counts.empty:
         # Most demanded skills
         st.subheader("Most Demanded Skills")
         fig = px.bar(skill_counts, title="Top 15 Most Demanded Skills",
@@ -227,33 +274,39 @@ def show_skills_analysis(df):
 
         # Skills by category
         st.subheader("Skills Distribution by Job Category")
-        category_skills = df.groupby('category')['skills_required'].apply(
-            lambda x: ','.join(x.dropna())
-        ).reset_index()
-
-        # Create a skills by category visualization
-        category_skill_counts = {}
-        for _, row in category_skills.iterrows():
-            category = row['category']
-            skills_text = row['skills_required']
-            skills = [s.strip() for s in skills_text.split(',') if s.strip()]
-            category_skill_counts[category] = len(set(skills))
-
-        skill_diversity = pd.Series(category_skill_counts).sort_values(ascending=False)
+        skill_diversity = market['skill_diversity']
         fig = px.bar(skill_diversity.head(10), title="Skill Diversity by Job Category",
                     labels={'value': 'Unique Skills Required', 'index': 'Job Category'})
         st.plotly_chart(fig, use_container_width=True)
+
+        # Skills required together
+        st.subheader("Skills Frequently Required Together")
+        fig = px.imshow(market['skill_cooccurrence'], text_auto=True, color_continuous_scale='Blues',
+                       title="Postings Listing Both Skills (Top 15 Skills)",
+                       labels={'color': 'Postings'})
+        st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No skills data available for analysis")
 
-def show_ml_insights(df):
+def show_ml_insights(df, fingerprint):
     st.header("🤖 Machine Learning Insights")
 
     # Train advanced model
     st.subheader("Model Training & Performance")
 
+    # Training is the slowest thing on the page, so it only starts on request;
+    # the trained model is cached per dataset version for every admin
+    trained = os.path.exists(model_artifact_path(fingerprint, 'applications_count', 'rf'))
+    if not trained and not st.session_state.get("admin_model_requested"):
+        st.info("Train the demand model to see its accuracy, feature importance and predictions.")
+        if st.button("🚀 Train Model", type="primary"):
+            st.session_state.admin_model_requested = True
+            st.rerun()
+        return
+
     try:
-        model, scaler, features, metrics = train_advanced_model(df, target_column='applications_count', model_type='rf')
+        artifact = trained_model(fingerprint, df)
+        metrics = artifact['metrics']
 
         col1, col2, col3 = st.columns(3)
 
@@ -267,31 +320,25 @@ def show_ml_insights(df):
             st.metric("Test MAE", f"{metrics['test_mae']:.1f}")
 
         # Feature importance
-        if hasattr(model, 'feature_importances_'):
+        if artifact['feature_importances'] is not None:
             st.subheader("Feature Importance")
-            importance_df = pd.DataFrame({
-                'feature': features,
-                'importance': model.feature_importances_
-            }).sort_values('importance', ascending=False)
+            importance_df = artifact['feature_importances'].rename_axis('feature').reset_index(name='importance')
 
             fig = px.bar(importance_df.head(10), x='importance', y='feature',
                         title="Top 10 Most Important Features",
                         orientation='h')
             st.plotly_chart(fig, use_container_width=True)
 
-        # Model predictions vs actual
+        # Model predictions vs actual, stored with the model when it was trained
         st.subheader("Model Predictions Analysis")
-        X = df[features].fillna(0)
-        X_scaled = scaler.transform(X)
-        predictions = model.predict(X_scaled)
-
         pred_df = pd.DataFrame({
-            'Actual': df['applications_count'].fillna(0),
-            'Predicted': predictions,
-            'Error': abs(df['applications_count'].fillna(0) - predictions)
+            'Actual': artifact['actual'],
+            'Predicted': artifact['predictions'],
+            'Error': np.abs(artifact['residuals'])
         })
 
-        fig = px.scatter(pred_df, x='Actual', y='Predicted',
+        points = downsample(pred_df, 'Actual', 'Predicted', outlier_columns=['Actual', 'Predicted', 'Error'])
+        fig = px.scatter(points, x='Actual', y='Predicted',
                         title="Predicted vs Actual Applications",
                         labels={'Actual': 'Actual Applications', 'Predicted': 'Predicted Applications'})
         fig.add_trace(go.Scatter(x=[0, pred_df['Actual'].max()],
@@ -299,6 +346,7 @@ def show_ml_insights(df):
                                mode='lines', name='Perfect Prediction',
                                line=dict(dash='dash', color='red')))
         st.plotly_chart(fig, use_container_width=True)
+        sample_caption(len(points), len(pred_df))
 
     except Exception as e:
         st.error(f"Error training model: {e}")
@@ -0,0 +1,173 @@
+import itertools
+import os
+import threading
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+
+from .migrations import run_migrations
+
+# Local fallback used when no PostgreSQL URL is configured or reachable
+SQLITE_URL = "sqlite:///users.db"
+
+# Connection pool settings, overridable through the environment
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, below typical server idle timeouts
+
+# Applied to every new SQLite connection so concurrent sessions wait instead of failing with
+# "database is locked": WAL lets readers run alongside the single writer
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 10000)),
+    'synchronous': 'NORMAL',  # Durable in WAL mode except for the last commits on power loss
+    'cache_size': -32000,  # Negative means KiB: 32 MB page cache per connection
+    'mmap_size': 256 * 1024 * 1024
+}
+
+# Seconds after a user's write during which their reads stay on the primary,
+# so they see their own writes even if replicas lag
+REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 30))
+
+_engine = None
+_engine_lock = threading.Lock()
+_replicas = None
+_replica_lock = threading.Lock()
+_replica_turn = itertools.count()
+
+def _db_secrets():
+    try:
+        import streamlit as st
+        if hasattr(st, 'runtime') and st.runtime.exists():
+            if hasattr(st, 'secrets') and 'db' in st.secrets:
+                return st.secrets['db']
+    except Exception:
+        pass  # Not in Streamlit context
+    return {}
+
+def configured_url():
+    """Primary database URL from Streamlit secrets ([db] url) or DATABASE_URL, else None"""
+    return _db_secrets().get('url') or os.getenv("DATABASE_URL")
+
+def configured_replica_urls():
+    """
+    Read-replica URLs from Streamlit secrets ([db] replica_urls, a list) or
+    DB_REPLICA_URLS (comma separated). Locally, two SQLite files work:
+        DATABASE_URL=sqlite:///primary.db DB_REPLICA_URLS=sqlite:///replica.db
+    """
+    urls = _db_secrets().get('replica_urls') or os.getenv("DB_REPLICA_URLS", "")
+    if isinstance(urls, str):
+        urls = urls.split(",")
+    return [url.strip() for url in urls if url.strip()]
+
+def tune_sqlite_connection(dbapi_conn, connection_record=None):
+    """Apply SQLITE_PRAGMAS to a raw sqlite3 connection"""
+    cur = dbapi_conn.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cur.execute(f"PRAGMA {name}={value}")
+    cur.close()
+
+def create_pooled_engine(url, tune_sqlite=True):
+    """Create an engine with the shared pool settings for either backend"""
+    connect_args = {}
+    if url.startswith("sqlite"):
+        connect_args['check_same_thread'] = False  # Pooled connections move between session threads
+    elif url.startswith("postgresql"):
+        connect_args['connect_timeout'] = 10
+        if 'sslmode' not in url:
+            connect_args['sslmode'] = 'require'
+
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args
+    )
+    if tune_sqlite and engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        event.listen(engine, "connect", tune_sqlite_connection)
+    return engine
+
+def _connect():
+    url = configured_url()
+    if url:
+        engine = None
+        try:
+            engine = create_pooled_engine(url)
+            # Probe once per process; pre-ping keeps checking pooled connections afterwards
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return engine
+        except Exception:
+            # Suppress verbose PostgreSQL errors - we expect this to fail and fall back to SQLite
+            if engine is not None:
+                engine.dispose()
+
+    return create_pooled_engine(SQLITE_URL)
+
+def get_engine():
+    """
+    The process-wide database engine
+
+    Created on first use (the configured primary, else local SQLite) and
+    then shared by every caller, so requests borrow pooled connections
+    instead of building a new engine and probing the server each time.
+    Pending schema migrations run once, when the engine is created.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _connect()
+                try:
+                    applied = run_migrations(engine)
+                    if applied:
+                        print(f"Database migrated to version {applied[-1]}")
+                except Exception as e:
+                    print(f"Database migration failed: {e}")
+                _engine = engine
+    return _engine
+
+def get_replica_engines():
+    """Pooled engines for the configured read replicas that answered a probe; may be empty"""
+    global _replicas
+    if _replicas is None:
+        with _replica_lock:
+            if _replicas is None:
+                engines = []
+                for url in configured_replica_urls():
+                    engine = None
+                    try:
+                        engine = create_pooled_engine(url)
+                        with engine.connect() as conn:
+                            conn.execute(text("SELECT 1"))
+                        engines.append(engine)
+                    except Exception as e:
+                        print(f"Read replica unavailable, skipping: {e.__class__.__name__}")
+                        if engine is not None:
+                            engine.dispose()
+                _replicas = engines
+    return _replicas
+
+def get_read_engine():
+    """Engine for a read that tolerates replication lag: replicas in turn, else the primary"""
+    replicas = get_replica_engines()
+    if not replicas:
+        return get_engine()
+    return replicas[next(_replica_turn) % len(replicas)]
+
+def reset_engine():
+    """Dispose the shared engines so the next get_engine() reconnects"""
+    global _engine, _replicas
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+    with _replica_lock:
+        for engine in _replicas or []:
+            engine.dispose()
+        _replicas = None
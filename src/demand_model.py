@@ -1,3 +1,5 @@
+import os
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -9,6 +11,9 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 import re
 import streamlit as st
 
+# Trained models and their per-posting outputs, one file per dataset version
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), "..", "models"))
+
 def predict_demand(stipend):
     """Legacy simple prediction for backward compatibility"""
     if stipend > 20000:
@@ -149,6 +154,66 @@ def train_advanced_model(df, target_column='applications_count', model_type='rf'
 
     return model, scaler, feature_columns, metrics
 
+def model_artifact_path(fingerprint, target_column='applications_count', model_type='rf', model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"demand_{model_type}_{target_column}_{fingerprint}.joblib")
+
+def _load_model_artifact(fingerprint, target_column='applications_count', model_type='rf', model_dir=MODEL_DIR):
+    """Stored artifact for a dataset version, or None if it was never trained or can't be read"""
+    path = model_artifact_path(fingerprint, target_column, model_type, model_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"Ignoring unreadable model artifact {path}: {e}")
+        return None
+
+def model_artifact(df, fingerprint, target_column='applications_count', model_type='rf', model_dir=MODEL_DIR):
+    """
+    Trained demand model with everything the insights view shows about it
+
+    Loaded from model_dir when this dataset version (fingerprint) was
+    trained before; otherwise trained, scored on every posting once and
+    saved there.
+
+    Returns:
+        dict with model, scaler, features, metrics, feature_importances
+        (Series sorted descending, or None for models without them) and
+        per-posting float32 arrays actual, predictions and residuals
+        (actual - predicted)
+    """
+    artifact = _load_model_artifact(fingerprint, target_column, model_type, model_dir)
+    if artifact is not None:
+        return artifact
+
+    model, scaler, features, metrics = train_advanced_model(df, target_column=target_column, model_type=model_type)
+    actual = df[target_column].fillna(0).to_numpy(dtype=np.float32)
+    predictions = model.predict(scaler.transform(df[features].fillna(0))).astype(np.float32)
+    importances = None
+    if hasattr(model, 'feature_importances_'):
+        importances = pd.Series(model.feature_importances_, index=features).sort_values(ascending=False)
+
+    artifact = {
+        'model': model,
+        'scaler': scaler,
+        'features': features,
+        'metrics': metrics,
+        'feature_importances': importances,
+        'actual': actual,
+        'predictions': predictions,
+        'residuals': actual - predictions
+    }
+
+    path = model_artifact_path(fingerprint, target_column, model_type, model_dir)
+    try:
+        os.makedirs(model_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)  # Readers never see a partial file
+    except OSError as e:
+        print(f"Could not save model artifact {path}: {e}")
+    return artifact
+
 def train_model(df):
     """Legacy function for backward compatibility"""
     X = df[["stipend","tech_skill_count","company_score","is_remote"]]
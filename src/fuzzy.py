@@ -0,0 +1,82 @@
+import numpy as np
+
+# Minimum Dice similarity of trigram sets for a fuzzy match ("pyhton" ~ "python" is 0.43)
+SIMILARITY_THRESHOLD = 0.4
+
+# Renamed Indian cities whose spellings share too few trigrams to match fuzzily
+CITY_ALIASES = {
+    "bengaluru": "bangalore",
+    "gurugram": "gurgaon",
+    "bombay": "mumbai",
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "trivandrum": "thiruvananthapuram",
+    "poona": "pune",
+}
+
+def trigrams(text):
+    """Character trigrams of a padded, lower-cased term"""
+    padded = f"  {' '.join(str(text).lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Resolves misspelled terms to a canonical vocabulary
+
+    Each trigram maps to the ids of the vocabulary terms containing it, so
+    scoring a query only touches the terms that share a trigram with it.
+    """
+
+    def __init__(self, terms, aliases=None):
+        self.terms = sorted({t.strip() for t in terms if isinstance(t, str) and t.strip()}, key=str.lower)
+        self._terms = set(self.terms)
+        self._exact = {}
+        for term in self.terms:
+            self._exact.setdefault(term.lower(), term)
+        for alias, target in (aliases or {}).items():
+            if target in self._exact:
+                self._exact.setdefault(alias, self._exact[target])
+
+        grams = {}
+        sizes = []
+        for term_id, term in enumerate(self.terms):
+            term_grams = trigrams(term)
+            sizes.append(len(term_grams))
+            for gram in term_grams:
+                grams.setdefault(gram, []).append(term_id)
+        self._sizes = np.array(sizes, dtype=np.float64)
+        self._grams = {g: np.array(ids, dtype=np.int32) for g, ids in grams.items()}
+
+    def similar(self, query, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """Vocabulary terms most similar to query as (term, similarity) pairs"""
+        query_grams = trigrams(query)
+        shared = np.zeros(len(self.terms), dtype=np.float64)
+        for gram in query_grams:
+            ids = self._grams.get(gram)
+            if ids is not None:
+                shared[ids] += 1
+        candidates = np.flatnonzero(shared)
+        if not len(candidates):
+            return []
+        scores = 2 * shared[candidates] / (self._sizes[candidates] + len(query_grams))
+        keep = scores >= threshold
+        candidates, scores = candidates[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(self.terms[candidates[i]], round(float(scores[i]), 3)) for i in order]
+
+    def exact(self, query):
+        """Canonical spelling of query by case-insensitive match or alias only, else None"""
+        if query in self._terms:
+            return query
+        return self._exact.get(" ".join(str(query).lower().split()))
+
+    def resolve(self, query, threshold=SIMILARITY_THRESHOLD):
+        """Canonical spelling of query, or None when nothing is similar enough"""
+        match = self.exact(query)
+        if match is not None:
+            return match
+        key = " ".join(str(query).lower().split())
+        if not key:
+            return None
+        matches = self.similar(key, limit=1, threshold=threshold)
+        return matches[0][0] if matches else None
@@ -0,0 +1,146 @@
+import atexit
+import queue
+import threading
+import time
+
+from .database import get_engine
+from .repositories import HistoryRepo
+
+# Pending rows held in memory before new ones are dropped
+QUEUE_SIZE = 10000
+
+# A batch is written once it has this many rows or is this many seconds old
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 2.0
+
+# History table -> HistoryRepo method that inserts a batch of its rows
+INSERTS = {
+    'search_history': 'add_searches',
+    'recommendation_history': 'add_recommendations'
+}
+
+class HistoryWriter:
+    """
+    Write-behind queue for search and recommendation history
+
+    Callers enqueue rows and return immediately; a background thread
+    writes them in batches with executemany. When the queue is full rows
+    are dropped and counted rather than blocking the user. History is
+    telemetry, so a batch that fails to write is counted and discarded.
+    """
+
+    def __init__(self, engine_factory=get_engine, queue_size=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.repo = HistoryRepo(engine_factory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def log(self, table, row):
+        """Queue one history row; never blocks"""
+        if table not in INSERTS:
+            raise ValueError(f"Unknown history table: {table}")
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            with self._count_lock:
+                self.dropped += 1
+            return False
+        with self._count_lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self):
+        """Write everything queued so far"""
+        with self._flush_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+            if batch:
+                self._write(batch)
+
+    def close(self):
+        """Stop the flusher and write remaining rows"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            # Wait until a full batch is queued or the interval elapses
+            while self._queue.qsize() < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 0.1))
+            self.flush()
+
+    def _write(self, batch):
+        rows = {}
+        for table, row in batch:
+            rows.setdefault(table, []).append(row)
+        # Each table is its own transaction, so count outcomes per table
+        for table, params in rows.items():
+            try:
+                getattr(self.repo, INSERTS[table])(params)
+                with self._count_lock:
+                    self.written += len(params)
+            except Exception as e:
+                with self._count_lock:
+                    self.failed += len(params)
+                print(f"History write to {table} failed ({len(params)} rows): {e}")
+
+_writer = HistoryWriter()
+atexit.register(_writer.close)
+
+def get_history_writer():
+    """The history writer shared by every session in this process"""
+    return _writer
+
+def log_search(username, skill, city):
+    return _writer.log('search_history', {"username": username, "skill": skill, "city": city})
+
+def log_recommendation(username, pref_location, pref_domain, min_stipend, remote_pref, experience_level):
+    return _writer.log('recommendation_history', {
+        "username": username,
+        "pref_location": pref_location,
+        "pref_domain": pref_domain,
+        "min_stipend": min_stipend,
+        "remote_pref": remote_pref,
+        "experience_level": experience_level
+    })
@@ -0,0 +1,371 @@
+"""
+Versioned schema migrations
+
+Each migration runs once per database, in order, inside its own
+transaction, and is recorded in the schema_version table. A migration
+maps a dialect ('postgresql' / 'sqlite', or '*' for both) to a list of
+steps; a step is an SQL string or a callable taking (connection, dialect).
+"""
+
+from sqlalchemy import inspect, text
+
+# Rows per UPDATE batch when backfilling a column
+BACKFILL_BATCH = 1000
+
+def job_key(title, company, location):
+    """Case- and whitespace-insensitive identity of a job, unique per user in applications"""
+    return "|".join(" ".join(str(value or "").split()).lower() for value in (title, company, location))
+
+def _index_applied_at(conn, dialect):
+    # Legacy SQLite databases may have an applications table without applied_at
+    columns = {c['name'] for c in inspect(conn).get_columns('applications')}
+    if 'applied_at' in columns:
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_applications_username_applied
+            ON applications (LOWER(username), applied_at)
+        """))
+    else:
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_applications_username_lower
+            ON applications (LOWER(username))
+        """))
+
+def _index_group_columns(conn, dialect):
+    # Admin aggregates GROUP BY these; the index lets the database count without reading whole rows
+    columns = {c['name'] for c in inspect(conn).get_columns('applications')}
+    for column in ('company', 'location'):
+        if column in columns:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_applications_{column} ON applications ({column})"))
+
+def _index_applications_page(conn, dialect):
+    columns = {c['name'] for c in inspect(conn).get_columns('applications')}
+    if 'applied_at' in columns:
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_applications_username_applied_id
+            ON applications (LOWER(username), applied_at, id)
+        """))
+        conn.execute(text("DROP INDEX IF EXISTS idx_applications_username_applied"))
+
+def _dedupe_applications(conn, dialect):
+    columns = {c['name'] for c in inspect(conn).get_columns('applications')}
+    if 'job_title' not in columns:
+        return  # Legacy schema has no job columns to key on
+    if 'job_key' not in columns:
+        conn.execute(text("ALTER TABLE applications ADD COLUMN job_key TEXT"))
+
+    # Read in id order one batch at a time so memory stays flat on large tables
+    select = text("""
+        SELECT id, job_title, company, location FROM applications
+        WHERE id > :last ORDER BY id LIMIT :limit
+    """)
+    update = text("UPDATE applications SET job_key = :job_key WHERE id = :id")
+    last = 0
+    while True:
+        rows = conn.execute(select, {"last": last, "limit": BACKFILL_BATCH}).fetchall()
+        if not rows:
+            break
+        conn.execute(update, [{"id": row[0], "job_key": job_key(row[1], row[2], row[3])} for row in rows])
+        last = rows[-1][0]
+
+    # Keep each user's first application to a job
+    conn.execute(text("""
+        DELETE FROM applications
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM applications GROUP BY LOWER(username), job_key
+        )
+    """))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_username_job_key
+        ON applications (LOWER(username), job_key)
+    """))
+
+    # Deleted duplicates were already counted; rebuild the rollups from scratch
+    for dimension in ('company', 'location', 'title'):
+        conn.execute(text(f"DELETE FROM application_rollup_{dimension}"))
+    conn.execute(text("UPDATE rollup_state SET last_id = 0 WHERE name = 'applications'"))
+
+MIGRATIONS = [
+    (1, "Create users, applications and history tables", {
+        'postgresql': [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username TEXT UNIQUE,
+                email TEXT UNIQUE,
+                password BYTEA,
+                role TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS applications (
+                id SERIAL PRIMARY KEY,
+                username TEXT,
+                job_title TEXT,
+                company TEXT,
+                location TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS search_history (
+                id SERIAL PRIMARY KEY,
+                username TEXT,
+                skill TEXT,
+                city TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS recommendation_history (
+                id SERIAL PRIMARY KEY,
+                username TEXT,
+                pref_location TEXT,
+                pref_domain TEXT,
+                min_stipend INTEGER,
+                remote_pref BOOLEAN,
+                experience_level TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        ],
+        'sqlite': [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE,
+                email TEXT UNIQUE,
+                password BLOB,
+                role TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS applications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT,
+                job_title TEXT,
+                company TEXT,
+                location TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS search_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT,
+                skill TEXT,
+                city TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS recommendation_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT,
+                pref_location TEXT,
+                pref_domain TEXT,
+                min_stipend INTEGER,
+                remote_pref BOOLEAN,
+                experience_level TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        ]
+    }),
+    # Every hot query filters on LOWER(username); the expressions must match for the index to be used
+    (2, "Index normalized usernames", {
+        '*': [
+            "CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users (LOWER(username))",
+            "CREATE INDEX IF NOT EXISTS idx_search_history_username_lower ON search_history (LOWER(username))",
+            "CREATE INDEX IF NOT EXISTS idx_recommendation_history_username_lower ON recommendation_history (LOWER(username))",
+            _index_applied_at  # (LOWER(username), applied_at) also serves plain username lookups
+        ]
+    }),
+    (3, "Index application company and location", {
+        '*': [_index_group_columns]
+    }),
+    # Daily application counts per company / location / title, advanced from rollup_state.last_id
+    (4, "Create application rollup tables", {
+        'postgresql': [
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_company (
+                day DATE NOT NULL,
+                company TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, company)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_location (
+                day DATE NOT NULL,
+                location TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, location)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_title (
+                day DATE NOT NULL,
+                title TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, title)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "INSERT INTO rollup_state (name, last_id) VALUES ('applications', 0)"
+        ],
+        'sqlite': [
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_company (
+                day TEXT NOT NULL,
+                company TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, company)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_location (
+                day TEXT NOT NULL,
+                location TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, location)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS application_rollup_title (
+                day TEXT NOT NULL,
+                title TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, title)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "INSERT INTO rollup_state (name, last_id) VALUES ('applications', 0)"
+        ]
+    }),
+    # History pages seek on (LOWER(username), time, id); these replace the username-only indexes
+    (5, "Index history for keyset pagination", {
+        '*': [
+            "CREATE INDEX IF NOT EXISTS idx_search_history_username_ts_id ON search_history (LOWER(username), timestamp, id)",
+            "DROP INDEX IF EXISTS idx_search_history_username_lower",
+            "CREATE INDEX IF NOT EXISTS idx_recommendation_history_username_ts_id ON recommendation_history (LOWER(username), timestamp, id)",
+            "DROP INDEX IF EXISTS idx_recommendation_history_username_lower",
+            _index_applications_page
+        ]
+    }),
+    (6, "Deduplicate applications by user and job key", {
+        '*': [_dedupe_applications]
+    }),
+    # Per-user weekly counts that history rows are compacted into once past the retention window
+    (7, "Create weekly history summary tables", {
+        'postgresql': [
+            """
+            CREATE TABLE IF NOT EXISTS search_history_weekly (
+                username TEXT NOT NULL,
+                week DATE NOT NULL,
+                skill TEXT NOT NULL,
+                city TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (username, week, skill, city)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS recommendation_history_weekly (
+                username TEXT NOT NULL,
+                week DATE NOT NULL,
+                pref_location TEXT NOT NULL,
+                pref_domain TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (username, week, pref_location, pref_domain)
+            )
+            """
+        ],
+        'sqlite': [
+            """
+            CREATE TABLE IF NOT EXISTS search_history_weekly (
+                username TEXT NOT NULL,
+                week TEXT NOT NULL,
+                skill TEXT NOT NULL,
+                city TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (username, week, skill, city)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS recommendation_history_weekly (
+                username TEXT NOT NULL,
+                week TEXT NOT NULL,
+                pref_location TEXT NOT NULL,
+                pref_domain TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (username, week, pref_location, pref_domain)
+            )
+            """
+        ]
+    }),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    """Highest applied migration, 0 for a fresh database"""
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+def _statements(migration, dialect):
+    steps = migration.get(dialect, migration.get('*'))
+    if steps is None:
+        raise RuntimeError(f"Migration has no statements for {dialect}")
+    return steps
+
+def run_migrations(engine):
+    """
+    Bring the database schema up to LATEST_VERSION
+
+    Returns:
+        list of versions applied by this call
+    """
+    dialect = engine.dialect.name
+    applied = []
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        if current_version(conn) >= LATEST_VERSION:
+            return applied
+
+    for version, description, migration in MIGRATIONS:
+        with engine.begin() as conn:
+            # Serialize concurrent app instances starting up against the same database
+            if dialect == 'postgresql':
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_version'))"))
+            else:
+                conn.execute(text("UPDATE schema_version SET version = version WHERE 1 = 0"))
+            if current_version(conn) >= version:
+                continue
+            for step in _statements(migration, dialect):
+                if callable(step):
+                    step(conn, dialect)
+                else:
+                    conn.execute(text(step))
+            conn.execute(text("""
+                INSERT INTO schema_version (version, description) VALUES (:version, :description)
+            """), {"version": version, "description": description})
+        applied.append(version)
+
+    return applied
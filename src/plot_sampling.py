@@ -0,0 +1,116 @@
+"""
+Data reduction for large scatter plots
+
+Plotly sends every point to the browser, so charts over the full postings
+frame grow with the dataset. downsample() keeps a chart to a fixed point
+budget: extreme points on any chosen column are always kept, and the rest
+is sampled per cell of an x/y grid (optionally per stratum, e.g. the
+colour column) in proportion to the cell's size, with at least one point
+from every occupied cell so sparse regions stay visible.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Maximum points per scatter plot
+PLOT_POINT_BUDGET = int(os.getenv("PLOT_POINT_BUDGET", 5000))
+
+# Points below this quantile or above 1 - this quantile on a column count as outliers
+OUTLIER_QUANTILE = 0.005
+
+# Outliers may use at most this share of the budget
+OUTLIER_SHARE = 0.2
+
+def downsample(df, x, y, budget=PLOT_POINT_BUDGET, strata=None, outlier_columns=None,
+               bins=25, seed=0):
+    """
+    Rows of df to plot, at most about budget of them
+
+    Args:
+        df: Frame to plot
+        x, y: Plot axes; the sampling grid is built on these
+        budget: Target number of points
+        strata: Optional column sampled separately, e.g. the colour column
+        outlier_columns: Columns whose extremes are always kept (default x and y)
+        bins: Grid cells per axis
+        seed: Random seed, so reruns show the same points
+
+    Returns:
+        df unchanged when it already fits, else a subset in the original order
+    """
+    if len(df) <= budget:
+        return df
+
+    outlier_columns = outlier_columns or [x, y]
+    outliers = np.zeros(len(df), dtype=bool)
+    for column in outlier_columns:
+        values = df[column].to_numpy(dtype=float)
+        low, high = np.nanquantile(values, [OUTLIER_QUANTILE, 1 - OUTLIER_QUANTILE])
+        outliers |= (values < low) | (values > high)
+
+    # Keep the most extreme outliers first if there are more than the budget allows
+    outlier_idx = np.flatnonzero(outliers)
+    max_outliers = int(budget * OUTLIER_SHARE)
+    if len(outlier_idx) > max_outliers:
+        extremity = np.zeros(len(outlier_idx))
+        for column in outlier_columns:
+            values = df[column].to_numpy(dtype=float)[outlier_idx]
+            rank = pd.Series(values).rank(pct=True).to_numpy()
+            extremity = np.maximum(extremity, np.abs(rank - 0.5))
+        outlier_idx = outlier_idx[np.argsort(-extremity, kind='stable')[:max_outliers]]
+
+    inlier_idx = np.flatnonzero(~outliers)
+    remaining = budget - len(outlier_idx)
+    cells = _grid_cells(df.iloc[inlier_idx], x, y, bins, strata)
+
+    # One point per occupied cell, the rest of the budget in proportion to cell size
+    counts = np.bincount(cells)
+    spare = max(remaining - len(counts), 0) / max(len(inlier_idx) - len(counts), 1)
+    quota = 1 + np.floor((counts - 1) * spare).astype(np.int64)
+
+    # Shuffle, then keep the first quota[cell] rows of each cell
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(inlier_idx))
+    shuffled_cells = cells[order]
+    rank = pd.Series(shuffled_cells).groupby(shuffled_cells).cumcount().to_numpy()
+    sampled_idx = inlier_idx[order[rank < quota[shuffled_cells]]]
+
+    keep = np.sort(np.concatenate([outlier_idx, sampled_idx]))
+    return df.iloc[keep]
+
+def _grid_cells(df, x, y, bins, strata):
+    """Dense cell id per row from equal-width x/y bins and the optional stratum"""
+    codes = [_bin(df[x], bins), _bin(df[y], bins)]
+    if strata is not None:
+        codes.append(pd.factorize(df[strata])[0] + 1)  # NaN stratum -> 0
+    combined = pd.MultiIndex.from_arrays(codes)
+    return pd.factorize(combined)[0]
+
+def _bin(series, bins):
+    values = series.to_numpy(dtype=float)
+    low, high = np.nanmin(values), np.nanmax(values)
+    if not np.isfinite(low) or high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    edges = np.linspace(low, high, bins + 1)[1:-1]
+    cells = np.digitize(values, edges)
+    cells[np.isnan(values)] = bins  # Missing values get their own bin
+    return cells
+
+def histogram(series, bins=50):
+    """
+    Pre-binned histogram of a numeric Series for px.bar
+
+    Returns:
+        DataFrame with bin start, end, centre and count, so the browser
+        receives one row per bin instead of every value
+    """
+    values = series.dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({
+        'start': edges[:-1],
+        'end': edges[1:],
+        'center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts
+    })
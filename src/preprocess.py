@@ -1,5 +1,6 @@
 import pandas as pd
 import os
+import hashlib
 from .demand_model import build_features
 
 def preprocess_data():
@@ -29,3 +30,8 @@ def preprocess_data():
     df = build_features(df)
     return df
 
+
+def dataset_fingerprint(df):
+    """Short content hash identifying a version of the dataset"""
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
@@ -0,0 +1,583 @@
+"""
+Data-access layer
+
+All reads and writes go through UserRepo, ApplicationRepo and HistoryRepo.
+SQL lives in the STATEMENTS registry, uses named parameters for every
+backend, and is turned into a statement object once per dialect; the
+engine's compiled cache then reuses the compiled form. Every execution is
+timed per statement name, so query_stats() shows where database time goes.
+Writes go to the primary; history and analytics reads may be served by a
+read replica (see Repository).
+"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+from .database import REPLICA_STICKY_SECONDS, get_engine, get_read_engine
+from .migrations import job_key
+
+# Statement name -> SQL, or {dialect: SQL} where backends differ. Usernames are
+# passed already lower-cased so LOWER(username) matches the functional indexes.
+STATEMENTS = {
+    'user_exists': """
+        SELECT username FROM users WHERE LOWER(username)=:username OR email=:email
+    """,
+    'user_insert': """
+        INSERT INTO users (username, email, password, role)
+        VALUES (:username, :email, :password, :role)
+    """,
+    'user_credentials': """
+        SELECT password, role FROM users WHERE LOWER(username)=:username
+    """,
+    # A repeat application (double click, rerun) hits the unique (LOWER(username), job_key) index and is skipped
+    'application_insert': """
+        INSERT INTO applications (username, job_title, company, location, job_key)
+        VALUES (:username, :job_title, :company, :location, :job_key)
+        ON CONFLICT DO NOTHING
+    """,
+    'applied_titles': """
+        SELECT DISTINCT job_title
+        FROM applications
+        WHERE LOWER(username)=:username
+    """,
+    'user_applications': """
+        SELECT job_title, company, location
+        FROM applications
+        WHERE LOWER(username)=:username
+    """,
+    'application_summary': """
+        SELECT COUNT(*) AS total, COUNT(DISTINCT company) AS companies, MAX(applied_at) AS latest
+        FROM applications
+        WHERE LOWER(username)=:username
+    """,
+    'application_summary_legacy': """
+        SELECT COUNT(*) AS total, COUNT(DISTINCT status) AS companies, NULL AS latest
+        FROM applications
+        WHERE LOWER(username)=:username
+    """,
+    'application_count': """
+        SELECT COUNT(*) FROM applications
+    """,
+    'top_companies': """
+        SELECT company, COUNT(*) AS count
+        FROM applications
+        WHERE company IS NOT NULL
+        GROUP BY company
+        ORDER BY count DESC, company
+        LIMIT :limit
+    """,
+    'top_companies_legacy': """
+        SELECT status AS company, COUNT(*) AS count
+        FROM applications
+        WHERE status IS NOT NULL
+        GROUP BY status
+        ORDER BY count DESC, status
+        LIMIT :limit
+    """,
+    'top_locations': """
+        SELECT location, COUNT(*) AS count
+        FROM applications
+        WHERE location IS NOT NULL
+        GROUP BY location
+        ORDER BY count DESC, location
+        LIMIT :limit
+    """,
+    'search_insert': """
+        INSERT INTO search_history (username, skill, city)
+        VALUES (:username, :skill, :city)
+    """,
+    'recommendation_insert': """
+        INSERT INTO recommendation_history (username, pref_location, pref_domain, min_stipend, remote_pref, experience_level)
+        VALUES (:username, :pref_location, :pref_domain, :min_stipend, :remote_pref, :experience_level)
+    """,
+}
+
+# Rows per page for the per-user history views
+PAGE_SIZE = 25
+
+# Paged query name -> (SELECT ... FROM, sort column). Pages are read newest first
+# by keyset on (sort column, id): the next page starts strictly after the last
+# row shown, so every page is an index range scan regardless of its depth.
+PAGED_QUERIES = {
+    'application_history': (
+        "SELECT job_title, company, location, applied_at, id FROM applications", 'applied_at'),
+    'application_history_legacy': (
+        "SELECT job_id as job_title, 'Applied' as company, '' as location, id as applied_at, id FROM applications", 'id'),
+    'search_history': (
+        "SELECT skill, city, timestamp, id FROM search_history", 'timestamp'),
+    'recommendation_history': (
+        "SELECT pref_location, pref_domain, min_stipend, remote_pref, experience_level, timestamp, id "
+        "FROM recommendation_history", 'timestamp')
+}
+
+for _name, (_select, _column) in PAGED_QUERIES.items():
+    STATEMENTS[f'{_name}_page'] = f"""
+        {_select}
+        WHERE LOWER(username)=:username
+        ORDER BY {_column} DESC, id DESC
+        LIMIT :limit
+    """
+    STATEMENTS[f'{_name}_page_after'] = f"""
+        {_select}
+        WHERE LOWER(username)=:username AND ({_column}, id) < (:after, :after_id)
+        ORDER BY {_column} DESC, id DESC
+        LIMIT :limit
+    """
+
+# Rollup dimension -> applications column it counts. Missing values are stored as ''
+# so each rollup's counts add up to the number of rolled-up applications.
+ROLLUP_DIMENSIONS = {'company': 'company', 'location': 'location', 'title': 'job_title'}
+
+# Applications newer than this many seconds are left for a later refresh. Ids are
+# handed out before commit, so a lower id can still become visible after a higher
+# one; waiting until in-flight inserts have settled keeps the mark from skipping it.
+ROLLUP_SETTLE_SECONDS = int(os.getenv("ROLLUP_SETTLE_SECONDS", 60))
+
+ROLLUP_DAY = {
+    'postgresql': "COALESCE(CAST(applied_at AS DATE), CURRENT_DATE)",
+    'sqlite': "COALESCE(DATE(applied_at), DATE('now'))"
+}
+
+STATEMENTS.update({
+    # Taking the row's write lock first serializes concurrent refreshes on both backends
+    'rollup_lock': "UPDATE rollup_state SET last_id = last_id WHERE name = 'applications'",
+    'rollup_position': "SELECT last_id FROM rollup_state WHERE name = 'applications'",
+    'rollup_advance': """
+        UPDATE rollup_state SET last_id = :last_id, updated_at = CURRENT_TIMESTAMP
+        WHERE name = 'applications'
+    """,
+    'applications_max_id': "SELECT COALESCE(MAX(id), 0) FROM applications",
+    # Highest id above the mark whose row is older than the settle window (a range scan of the primary key)
+    'rollup_settled_id': {
+        'postgresql': """
+            SELECT COALESCE(MAX(id), :low) FROM applications
+            WHERE id > :low
+              AND (applied_at IS NULL OR applied_at <= LOCALTIMESTAMP - :settle * INTERVAL '1 second')
+        """,
+        'sqlite': """
+            SELECT COALESCE(MAX(id), :low) FROM applications
+            WHERE id > :low
+              AND (applied_at IS NULL OR applied_at <= DATETIME('now', '-' || :settle || ' seconds'))
+        """
+    },
+    'rollup_total': "SELECT COALESCE(SUM(count), 0) FROM application_rollup_company",
+    'rollup_daily': """
+        SELECT day, SUM(count) AS count
+        FROM application_rollup_company
+        GROUP BY day
+        ORDER BY day
+    """
+})
+
+for _dimension, _column in ROLLUP_DIMENSIONS.items():
+    STATEMENTS[f'rollup_{_dimension}_refresh'] = {dialect: f"""
+        INSERT INTO application_rollup_{_dimension} (day, {_dimension}, count)
+        SELECT {day}, COALESCE({_column}, ''), COUNT(*)
+        FROM applications
+        WHERE id > :low AND id <= :high
+        GROUP BY 1, 2
+        ON CONFLICT (day, {_dimension}) DO UPDATE
+        SET count = application_rollup_{_dimension}.count + excluded.count
+    """ for dialect, day in ROLLUP_DAY.items()}
+    STATEMENTS[f'rollup_{_dimension}_top'] = f"""
+        SELECT {_dimension}, SUM(count) AS count
+        FROM application_rollup_{_dimension}
+        WHERE {_dimension} <> ''
+        GROUP BY {_dimension}
+        ORDER BY count DESC, {_dimension}
+        LIMIT :limit
+    """
+
+# Raw history older than this many days is compacted into weekly summaries
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", 90))
+
+# Rows archived and deleted per transaction, keeping write locks short
+RETENTION_BATCH = int(os.getenv("HISTORY_RETENTION_BATCH", 5000))
+
+# History table -> (weekly summary table, columns kept in the summary)
+RETENTION_TABLES = {
+    'search_history': ('search_history_weekly', ('skill', 'city')),
+    'recommendation_history': ('recommendation_history_weekly', ('pref_location', 'pref_domain'))
+}
+
+# Monday of the row's week
+RETENTION_WEEK = {
+    'postgresql': "CAST(DATE_TRUNC('week', timestamp) AS DATE)",
+    'sqlite': "DATE(timestamp, 'weekday 0', '-6 days')"
+}
+
+STATEMENTS['retention_cutoff'] = {
+    'postgresql': "SELECT LOCALTIMESTAMP - MAKE_INTERVAL(days => :days)",
+    'sqlite': "SELECT DATETIME('now', '-' || :days || ' days')"
+}
+
+for _table, (_weekly, _columns) in RETENTION_TABLES.items():
+    _keys = ", ".join(_columns)
+    STATEMENTS[f'{_table}_archive_high'] = f"""
+        SELECT MAX(id) FROM (
+            SELECT id FROM {_table} WHERE timestamp < :cutoff ORDER BY id LIMIT :limit
+        ) AS batch
+    """
+    STATEMENTS[f'{_table}_archive'] = {dialect: f"""
+        INSERT INTO {_weekly} (username, week, {_keys}, count)
+        SELECT COALESCE(LOWER(username), ''), {week}, {", ".join(f"COALESCE({c}, '')" for c in _columns)}, COUNT(*)
+        FROM {_table}
+        WHERE timestamp < :cutoff AND id <= :high
+        GROUP BY {", ".join(str(i) for i in range(1, len(_columns) + 3))}
+        ON CONFLICT (username, week, {_keys}) DO UPDATE
+        SET count = {_weekly}.count + excluded.count
+    """ for dialect, week in RETENTION_WEEK.items()}
+    STATEMENTS[f'{_table}_purge'] = f"""
+        DELETE FROM {_table} WHERE timestamp < :cutoff AND id <= :high
+    """
+    STATEMENTS[f'{_table}_weekly'] = f"""
+        SELECT week, {_keys}, count
+        FROM {_weekly}
+        WHERE username = :username
+        ORDER BY week DESC, count DESC
+        LIMIT :limit
+    """
+
+_statements = {}
+_statements_lock = threading.Lock()
+
+def statement(dialect, name):
+    """The statement object for a name on a dialect, built on first use"""
+    key = (dialect, name)
+    stmt = _statements.get(key)
+    if stmt is None:
+        sql = STATEMENTS[name]
+        if isinstance(sql, dict):
+            sql = sql[dialect]
+        with _statements_lock:
+            stmt = _statements.setdefault(key, text(sql))
+    return stmt
+
+class QueryStats:
+    """Call count and latency per statement name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, seconds):
+        with self._lock:
+            calls, total, worst = self._stats.get(name, (0, 0.0, 0.0))
+            self._stats[name] = (calls + 1, total + seconds, max(worst, seconds))
+
+    def snapshot(self):
+        with self._lock:
+            rows = [{
+                'statement': name,
+                'calls': calls,
+                'total_ms': round(total * 1000, 2),
+                'avg_ms': round(total / calls * 1000, 3),
+                'max_ms': round(worst * 1000, 3)
+            } for name, (calls, total, worst) in self._stats.items()]
+        return pd.DataFrame(rows, columns=['statement', 'calls', 'total_ms', 'avg_ms', 'max_ms'])
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+_query_stats = QueryStats()
+
+def query_stats():
+    """Per-statement timings for this process as a DataFrame"""
+    return _query_stats.snapshot()
+
+class RecentWrites:
+    """When each username last wrote, for read-your-writes routing (per process)"""
+
+    def __init__(self, window=REPLICA_STICKY_SECONDS, max_entries=10000):
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._last = {}
+
+    def mark(self, params):
+        now = time.monotonic()
+        rows = params if isinstance(params, list) else [params]
+        with self._lock:
+            for row in rows:
+                if row.get('username'):
+                    self._last[row['username'].lower()] = now
+            if len(self._last) > self.max_entries:
+                self._last = {u: t for u, t in self._last.items() if now - t < self.window}
+
+    def recent(self, username):
+        with self._lock:
+            last = self._last.get(username)
+        return last is not None and time.monotonic() - last < self.window
+
+_recent_writes = RecentWrites()
+
+class Repository:
+    """
+    Base class: runs named statements on the shared engines and times them
+
+    Writes and consistency-sensitive reads use the primary. Reads passed
+    replica=True go to a read replica when one is configured, except for
+    a username that wrote within REPLICA_STICKY_SECONDS, whose reads stay
+    on the primary. A replica read that fails is retried on the primary.
+    """
+
+    def __init__(self, engine_factory=get_engine, read_engine_factory=None):
+        self.engine_factory = engine_factory
+        if read_engine_factory is None:
+            read_engine_factory = get_read_engine if engine_factory is get_engine else engine_factory
+        self.read_engine_factory = read_engine_factory
+
+    @property
+    def engine(self):
+        return self.engine_factory()
+
+    def _run(self, conn, name, params=None):
+        start = time.perf_counter()
+        try:
+            return conn.execute(statement(conn.dialect.name, name), params if params is not None else {})
+        finally:
+            _query_stats.record(name, time.perf_counter() - start)
+
+    def _read(self, name, params, replica, consume):
+        primary = self.engine
+        engine = primary
+        if replica and not _recent_writes.recent((params or {}).get('username')):
+            engine = self.read_engine_factory()
+        try:
+            with engine.connect() as conn:
+                return consume(self._run(conn, name, params))
+        except OperationalError:
+            if engine is primary:
+                raise
+        with primary.connect() as conn:
+            return consume(self._run(conn, name, params))
+
+    def fetch_all(self, name, params=None, replica=False):
+        return self._read(name, params, replica, lambda result: result.fetchall())
+
+    def fetch_one(self, name, params=None, replica=False):
+        return self._read(name, params, replica, lambda result: result.fetchone())
+
+    def fetch_scalar(self, name, params=None, replica=False):
+        return self._read(name, params, replica, lambda result: result.scalar())
+
+    def fetch_frame(self, name, params=None, replica=False):
+        return self._read(name, params, replica,
+                          lambda result: pd.DataFrame(result.fetchall(), columns=list(result.keys())))
+
+    def fetch_page(self, name, params, cursor=None, limit=PAGE_SIZE, replica=False):
+        """
+        One page of a PAGED_QUERIES query
+
+        Returns:
+            (DataFrame without the id column, cursor for the next page or None on the last page)
+        """
+        column = PAGED_QUERIES[name][1]
+        params = dict(params, limit=limit + 1)  # One extra row tells whether another page exists
+        if cursor is None:
+            name = f'{name}_page'
+        else:
+            name = f'{name}_page_after'
+            params['after'], params['after_id'] = cursor
+        columns, rows = self._read(name, params, replica, lambda result: (list(result.keys()), result.fetchall()))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = (last[column], last['id'])
+        return pd.DataFrame(rows, columns=columns).drop(columns='id'), next_cursor
+
+    def write(self, name, params):
+        """Execute an INSERT/UPDATE on the primary; params may be a list of dicts for executemany"""
+        with self.engine.begin() as conn:
+            rowcount = self._run(conn, name, params).rowcount
+        _recent_writes.mark(params)
+        return rowcount
+
+class UserRepo(Repository):
+    def register(self, username, email, password_hash, role):
+        """Create a user; False if the username or email is taken"""
+        username = username.lower().strip()
+        with self.engine.begin() as conn:
+            if self._run(conn, 'user_exists', {"username": username, "email": email}).fetchone():
+                return False
+            self._run(conn, 'user_insert', {
+                "username": username,
+                "email": email,
+                "password": password_hash,
+                "role": role
+            })
+        _recent_writes.mark({"username": username})
+        return True
+
+    def credentials(self, username):
+        """(password hash bytes, role) for a username, or None"""
+        row = self.fetch_one('user_credentials', {"username": username.lower()})
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+class ApplicationRepo(Repository):
+    def __init__(self, engine_factory=get_engine, read_engine_factory=None):
+        super().__init__(engine_factory, read_engine_factory)
+        self._legacy = {}
+
+    def is_legacy(self):
+        """True for old SQLite databases whose applications table has no job_title"""
+        engine = self.engine
+        if engine not in self._legacy:
+            columns = {c['name'] for c in inspect(engine).get_columns('applications')}
+            self._legacy[engine] = 'job_title' not in columns
+        return self._legacy[engine]
+
+    def add(self, username, job_title, company, location):
+        """Record an application; False if the user already applied to this job"""
+        return self.write('application_insert', {
+            "username": username,
+            "job_title": job_title,
+            "company": company,
+            "location": location,
+            "job_key": job_key(job_title, company, location)
+        }) == 1
+
+    def applied_titles(self, username):
+        """Distinct titles a user applied to, lower-cased"""
+        return [str(row[0]).lower() for row in self.fetch_all('applied_titles', {"username": username.lower()}, replica=True)]
+
+    def for_user(self, username):
+        """A user's applications (job_title, company, location) for collaborative filtering"""
+        return self.fetch_frame('user_applications', {"username": username.lower()}, replica=True)
+
+    def history(self, username, cursor=None, limit=PAGE_SIZE):
+        """A page of a user's applications, newest first; see fetch_page"""
+        name = 'application_history_legacy' if self.is_legacy() else 'application_history'
+        return self.fetch_page(name, {"username": username.lower()}, cursor, limit, replica=True)
+
+    def summary(self, username):
+        """(total applications, distinct companies, latest applied_at) for a user"""
+        name = 'application_summary_legacy' if self.is_legacy() else 'application_summary'
+        return tuple(self.fetch_one(name, {"username": username.lower()}, replica=True))
+
+    def high_water_mark(self):
+        """Highest applications.id; changes whenever an application is added"""
+        return self.fetch_scalar('applications_max_id', replica=True)
+
+    def count(self):
+        return self.fetch_scalar('application_count', replica=True)
+
+    def top_companies(self, limit=10):
+        """Most applied-to companies as a Series of counts, largest first"""
+        name = 'top_companies_legacy' if self.is_legacy() else 'top_companies'
+        return self._top(name, 'company', limit)
+
+    def top_locations(self, limit=10):
+        """Application counts per location, largest first"""
+        if self.is_legacy():
+            # Old schema stores no location; the dashboard shows nothing for an empty Series
+            return pd.Series(dtype='int64', name='count')
+        return self._top('top_locations', 'location', limit)
+
+    def _top(self, name, column, limit):
+        frame = self.fetch_frame(name, {"limit": limit}, replica=True)
+        return frame.set_index(column)['count'] if not frame.empty else pd.Series(dtype='int64', name='count')
+
+class HistoryRepo(Repository):
+    def add_searches(self, rows):
+        """Insert search_history rows (dicts with username, skill, city)"""
+        return self.write('search_insert', rows)
+
+    def add_recommendations(self, rows):
+        """Insert recommendation_history rows"""
+        return self.write('recommendation_insert', rows)
+
+    def searches(self, username, cursor=None, limit=PAGE_SIZE):
+        return self.fetch_page('search_history', {"username": username.lower()}, cursor, limit, replica=True)
+
+    def recommendations(self, username, cursor=None, limit=PAGE_SIZE):
+        return self.fetch_page('recommendation_history', {"username": username.lower()}, cursor, limit, replica=True)
+
+    def weekly(self, table, username, limit=52):
+        """Compacted per-week counts for history that has passed the retention window"""
+        return self.fetch_frame(f'{table}_weekly', {"username": username.lower(), "limit": limit}, replica=True)
+
+class RetentionRepo(Repository):
+    """
+    Compacts search and recommendation history past the retention window
+
+    Old rows are folded into per-user weekly count tables and deleted in
+    batches of RETENTION_BATCH ids. Each batch aggregates and deletes the
+    same rows in one transaction, so a failure part way through loses or
+    double counts nothing.
+    """
+
+    def cutoff(self, days=HISTORY_RETENTION_DAYS):
+        return self.fetch_scalar('retention_cutoff', {"days": days})
+
+    def compact(self, table, days=HISTORY_RETENTION_DAYS, batch_size=RETENTION_BATCH):
+        """Archive and delete rows of a RETENTION_TABLES table older than days; returns rows removed"""
+        cutoff = self.cutoff(days)
+        removed = 0
+        while True:
+            with self.engine.begin() as conn:
+                high = self._run(conn, f'{table}_archive_high', {"cutoff": cutoff, "limit": batch_size}).scalar()
+                if high is None:
+                    return removed
+                params = {"cutoff": cutoff, "high": high}
+                self._run(conn, f'{table}_archive', params)
+                removed += self._run(conn, f'{table}_purge', params).rowcount
+
+    def compact_all(self, days=HISTORY_RETENTION_DAYS, batch_size=RETENTION_BATCH):
+        return {table: self.compact(table, days, batch_size) for table in RETENTION_TABLES}
+
+class RollupRepo(Repository):
+    """
+    Daily application counts per company, location and title
+
+    refresh() folds applications with ids above the rollup_state high-water
+    mark into the rollup tables and advances the mark in the same
+    transaction, so each application is counted exactly once however often
+    it runs. The mark only moves past applications older than
+    ROLLUP_SETTLE_SECONDS, so an insert that took a lower id but commits
+    late is still above the mark when it becomes visible. Dashboard queries
+    then read the small rollup tables instead of scanning applications.
+    """
+
+    def refresh(self, settle_seconds=ROLLUP_SETTLE_SECONDS):
+        """Roll up settled applications added since the last refresh; returns the (old, new) high-water marks"""
+        with self.engine.begin() as conn:
+            self._run(conn, 'rollup_lock')
+            low = self._run(conn, 'rollup_position').scalar() or 0
+            high = self._run(conn, 'rollup_settled_id', {"low": low, "settle": settle_seconds}).scalar()
+            if high <= low:
+                return low, low
+            for dimension in ROLLUP_DIMENSIONS:
+                self._run(conn, f'rollup_{dimension}_refresh', {"low": low, "high": high})
+            self._run(conn, 'rollup_advance', {"last_id": high})
+        return low, high
+
+    def total(self):
+        return self.fetch_scalar('rollup_total', replica=True)
+
+    def daily(self):
+        """Applications per day, oldest first"""
+        frame = self.fetch_frame('rollup_daily', replica=True)
+        if not frame.empty:
+            frame['day'] = pd.to_datetime(frame['day'])
+        return frame
+
+    def top(self, dimension, limit=10):
+        """Largest counts for a dimension ('company', 'location' or 'title') as a Series"""
+        frame = self.fetch_frame(f'rollup_{dimension}_top', {"limit": limit}, replica=True)
+        return frame.set_index(dimension)['count'] if not frame.empty else pd.Series(dtype='int64', name='count')
+
+user_repo = UserRepo()
+application_repo = ApplicationRepo()
+history_repo = HistoryRepo()
+rollup_repo = RollupRepo()
+retention_repo = RetentionRepo()
@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Memory budget for cached search results across all sessions
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds a cached result stays valid
+RESULT_CACHE_TTL = 30 * 60
+
+class ResultCache:
+    """
+    Process-wide LRU cache for search results
+
+    Entries are keyed by dataset version plus the normalized query, so
+    results computed on an older dataset are never served. The cache is
+    bounded by the total bytes of the stored results and entries expire
+    after a TTL. Safe to share between Streamlit session threads.
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES, ttl=RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, nbytes, stored_at)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, version, key):
+        """Cached value for a query on a dataset version, or None"""
+        full_key = (version, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, nbytes, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._drop(full_key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(full_key)
+            self.hits += 1
+            return value
+
+    def put(self, version, key, value):
+        """Store a value exposing .nbytes, evicting least recently used entries to fit"""
+        full_key = (version, key)
+        nbytes = value.nbytes + sys.getsizeof(key)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if full_key in self._entries:
+                self._drop(full_key)
+            self._entries[full_key] = (value, nbytes, time.monotonic())
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def _drop(self, full_key):
+        _, nbytes, _ = self._entries.pop(full_key)
+        self.bytes -= nbytes
+
+_shared_cache = ResultCache()
+
+def get_result_cache():
+    """The result cache shared by every session in this process"""
+    return _shared_cache
@@ -0,0 +1,240 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from .fuzzy import CITY_ALIASES, TrigramIndex
+from .preprocess import dataset_fingerprint
+from .result_cache import get_result_cache
+from .text_index import InvertedIndex
+
+# Ranking modes: BM25 text relevance blended with the business score, or business score only
+RANKING_MODES = ("bm25", "business")
+
+# BM25 weight of each indexed field
+FIELD_WEIGHTS = {"title": 2.0, "skills_required": 1.5, "description": 1.0}
+
+# Share of the blended score taken by text relevance in "bm25" mode
+RELEVANCE_WEIGHT = 0.6
+
+def parse_keywords(query):
+    """Split a comma separated query into normalized, de-duplicated keywords"""
+    return tuple(sorted({k.strip().lower() for k in str(query or "").split(",") if k.strip()}))
+
+def split_skills(value):
+    """Split a skills_required value into its set of skills"""
+    if not isinstance(value, str):
+        return set()
+    return set(value.split(", "))
+
+def normalize_location(location):
+    """Reduce a location to its city, e.g. 'Bangalore,  Karnataka' -> 'Bangalore'"""
+    if not isinstance(location, str):
+        return ""
+    return re.sub(r"\s+", " ", location.split(",")[0]).strip()
+
+class SearchResults:
+    """
+    Ranked search hits stored as compact arrays
+
+    Only row positions into the engine's dataset and per-hit scores are
+    kept, so a result set costs 16 bytes per hit. Rows are materialized
+    from the shared dataset one page at a time.
+    """
+
+    __slots__ = ("ids", "scores", "relevance", "skill_scores")
+
+    def __init__(self, ids, scores, relevance, skill_scores):
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.relevance = np.asarray(relevance, dtype=np.float32)
+        self.skill_scores = np.asarray(skill_scores, dtype=np.float32)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """Memory held by the result arrays"""
+        return self.ids.nbytes + self.scores.nbytes + self.relevance.nbytes + self.skill_scores.nbytes
+
+    def subset(self, mask):
+        """Hits where mask is True, in the same order"""
+        return SearchResults(self.ids[mask], self.scores[mask], self.relevance[mask], self.skill_scores[mask])
+
+    def rows(self, df, start, stop):
+        """
+        Materialize hits start:stop as a DataFrame
+
+        Args:
+            df: The dataset the results were computed on (SearchEngine.df)
+            start, stop: Slice of the ranked hits
+
+        Returns:
+            DataFrame with the dataset columns plus 'score', 'relevance' and 'skill_score'
+        """
+        page = slice(start, stop)
+        rows = df.iloc[self.ids[page]].copy()
+        # Stored as float32 to save memory; widened so the UI shows 33.33, not 33.33000183105469
+        rows["score"] = np.round(self.scores[page].astype(np.float64), 4)
+        rows["relevance"] = np.round(self.relevance[page].astype(np.float64), 3)
+        rows["skill_score"] = np.round(self.skill_scores[page].astype(np.float64), 2)
+        return rows
+
+class SearchEngine:
+    """
+    Smart Search over the internship dataset
+
+    Everything that does not depend on the query (the description index,
+    business scores, skill postings) is computed once when the engine is
+    built, so a query only combines precomputed arrays. Ranked results are
+    kept in the process-wide result cache, keyed by dataset version.
+    """
+
+    def __init__(self, df, cache=None):
+        self.df = df
+        self.version = dataset_fingerprint(df)
+        self.cache = cache if cache is not None else get_result_cache()
+
+        self.indexes = {field: InvertedIndex(df[field].to_numpy()) for field in FIELD_WEIGHTS}
+        self.description_index = self.indexes["description"]
+        self._locations = df["location"].fillna("").astype(str).to_numpy()
+        self._titles = df["title"].fillna("").astype(str).str.lower().to_numpy()
+
+        # Business score: stipend, company reputation and remote availability
+        self._base_scores = (
+            df["stipend"].to_numpy(dtype=np.float64) * 0.01 +
+            df["company_score"].to_numpy(dtype=np.float64) * 10 +
+            df["is_remote"].to_numpy(dtype=np.float64) * 5
+        )
+
+        # Skill -> row positions, plus the number of distinct skills per row
+        postings = {}
+        self._skill_totals = np.zeros(len(df), dtype=np.float64)
+        for pos, value in enumerate(df["skills_required"].to_numpy()):
+            skills = split_skills(value)
+            self._skill_totals[pos] = len(skills)
+            for s in skills:
+                postings.setdefault(s, []).append(pos)
+        self._skill_postings = {s: np.array(ids, dtype=np.int32) for s, ids in postings.items()}
+
+        # Spelling resolution for query terms and cities; student skills only match exactly
+        self.skill_vocabulary = TrigramIndex(self._skill_postings)
+        self.location_vocabulary = TrigramIndex(pd.unique(df["location"].map(normalize_location)),
+                                                aliases=CITY_ALIASES)
+
+    def search(self, query, city="All", user_skills=None, exclude_titles=None, ranking="bm25"):
+        """
+        Find internships matching a query
+
+        Args:
+            query: Comma separated keywords matched against descriptions
+            city: Location to filter on, or "All"
+            user_skills: List of the student's skills used for skill scoring
+            exclude_titles: Job titles (any case) to leave out, e.g. already applied
+            ranking: 'bm25' to blend text relevance into the score, 'business' for
+                stipend/company/remote/skill score only
+
+        Returns:
+            SearchResults sorted by score; use results.rows(engine.df, start, stop)
+            to get a page of rows. Results are shared between callers and must
+            not be modified in place.
+        """
+        if ranking not in RANKING_MODES:
+            raise ValueError(f"Unknown ranking mode: {ranking}")
+        keywords = tuple(sorted(set(self.corrections(query).values())))
+        city = self.resolve_city(city)
+        # Only skills present in the dataset affect scores, so they alone form the cache bucket.
+        # No fuzzy matching here: "Java" is close to "JavaScript" but is a different skill
+        skills = tuple(sorted({self.skill_vocabulary.exact(s) or s for s in user_skills or []}
+                              & self._skill_postings.keys()))
+
+        key = (keywords, city, skills, ranking)
+        results = self.cache.get(self.version, key)
+        if results is None:
+            results = self._run(keywords, city, skills, ranking)
+            self.cache.put(self.version, key, results)
+
+        # Exclusions are per student, so they are applied to the shared ranking
+        excluded = [str(t).lower() for t in exclude_titles or []]
+        if excluded:
+            results = results.subset(~np.isin(self._titles[results.ids], excluded))
+        return results
+
+    def corrections(self, query):
+        """
+        Map each keyword of a query to the keyword actually searched
+
+        Keywords found in the descriptions are kept; ones that match nothing
+        are replaced by the closest skill from the vocabulary, so "pyhton"
+        searches for "python".
+        """
+        resolved = {}
+        for keyword in parse_keywords(query):
+            if not len(self.description_index.lookup(keyword)):
+                closest = self.skill_vocabulary.resolve(keyword)
+                resolved[keyword] = closest.lower() if closest else keyword
+            else:
+                resolved[keyword] = keyword
+        return resolved
+
+    def resolve_city(self, city):
+        """Canonical city for a typed or aliased name ("Bengaluru" -> "Bangalore")"""
+        if not city or city == "All":
+            return "All"
+        return self.location_vocabulary.resolve(city) or city
+
+    def _run(self, keywords, city, skills, ranking):
+        ids = np.flatnonzero(self._keyword_mask(keywords) & self._city_mask(city))
+
+        ratio = self._skill_ratio(skills)[ids]
+        scores = self._base_scores[ids] + ratio * 50  # Up to 50 points for perfect skill match
+        relevance = self._relevance(keywords)[ids]
+        if ranking == "bm25" and keywords and len(ids):
+            scores = ((1 - RELEVANCE_WEIGHT) * _normalize(scores) +
+                      RELEVANCE_WEIGHT * _normalize(relevance))
+        order = np.argsort(-scores, kind="stable")
+        skill_scores = np.round(ratio[order] * 100, 2) if skills else np.zeros(len(ids))
+        return SearchResults(ids[order], scores[order], relevance[order], skill_scores)
+
+    def _relevance(self, keywords):
+        """Field-weighted BM25 score of every row"""
+        scores = np.zeros(len(self.df), dtype=np.float64)
+        if not keywords:
+            return scores
+        for field, weight in FIELD_WEIGHTS.items():
+            scores += weight * self.indexes[field].bm25(keywords)
+        return scores
+
+    def _keyword_mask(self, keywords):
+        if not keywords:
+            return np.ones(len(self.df), dtype=bool)
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[self.description_index.match(keywords)] = True
+        return mask
+
+    def _city_mask(self, city):
+        if city == "All":
+            return np.ones(len(self.df), dtype=bool)
+        needle = city.lower()
+        matched = [loc for loc in pd.unique(self._locations) if needle in loc.lower()]
+        return np.isin(self._locations, matched)
+
+    def _skill_ratio(self, skills):
+        """Fraction of each row's required skills covered by the user's skills"""
+        matched = np.zeros(len(self.df), dtype=np.float64)
+        for s in skills:
+            ids = self._skill_postings.get(s)
+            if ids is not None:
+                matched[ids] += 1
+        return np.divide(matched, self._skill_totals, out=np.zeros_like(matched),
+                         where=self._skill_totals > 0)
+
+def _normalize(values):
+    """Scale non-negative values to 0-1 by their maximum"""
+    top = values.max()
+    return values / top if top > 0 else np.zeros_like(values)
@@ -0,0 +1,100 @@
+"""
+Skill statistics from a sparse posting x skill matrix
+
+skills_required is a comma separated string per posting. SkillMatrix
+splits the column once into a CSR matrix (one row per posting, one column
+per distinct skill) and derives every skill statistic from it with sparse
+matrix products instead of re-splitting strings in Python loops.
+"""
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+class SkillMatrix:
+    """
+    Postings x skills occurrence counts
+
+    Attributes:
+        matrix: CSR matrix of shape (postings, skills); entry (i, j) is how
+            often skill j is listed by posting i
+        skills: Index of skill names, one per column
+    """
+
+    def __init__(self, skills_required):
+        """
+        Args:
+            skills_required: Series of comma separated skill strings, one per
+                posting; missing and non-string values mean no skills
+        """
+        # Postings often share the exact same skills string, so split each distinct string once
+        strings, distinct = pd.factorize(skills_required, use_na_sentinel=True)
+        distinct = pd.Series(distinct, dtype=object)
+        distinct = distinct.where(distinct.map(lambda v: isinstance(v, str)))
+        exploded = distinct.str.split(',').explode().str.strip()
+        exploded = exploded[exploded.fillna('') != '']
+
+        codes, self.skills = pd.factorize(exploded, sort=True)
+        # Distinct strings x skills, plus an empty last row for missing values
+        by_string = sparse.csr_matrix(
+            (np.ones(len(codes), dtype=np.int32), (exploded.index.to_numpy(), codes)),
+            shape=(len(distinct) + 1, len(self.skills))
+        )  # Duplicate (row, col) pairs are summed
+        strings[strings < 0] = len(distinct)
+        self.matrix = by_string[strings]
+
+    @classmethod
+    def from_frame(cls, df, column='skills_required'):
+        return cls(df[column])
+
+    @cached_property
+    def presence(self):
+        """Binary version of matrix: does posting i list skill j"""
+        presence = self.matrix.copy()
+        presence.data = np.ones_like(presence.data)
+        return presence
+
+    @cached_property
+    def _counts(self):
+        return pd.Series(np.asarray(self.matrix.sum(axis=0)).ravel(), index=self.skills, name='count')
+
+    def counts(self, top=None):
+        """Mentions per skill, most frequent first"""
+        counts = self._counts.sort_values(ascending=False, kind='stable')
+        return counts.head(top) if top else counts
+
+    def unique_per_group(self, groups):
+        """
+        Number of distinct skills listed within each group of postings
+
+        Args:
+            groups: Series aligned with the postings, e.g. df['category'];
+                postings with a missing group are ignored
+
+        Returns:
+            Series indexed by group, including groups without any skills (0)
+        """
+        codes, labels = pd.factorize(groups.reset_index(drop=True))
+        valid = codes >= 0
+        membership = sparse.csr_matrix(
+            (np.ones(valid.sum(), dtype=np.int32), (codes[valid], np.flatnonzero(valid))),
+            shape=(len(labels), self.matrix.shape[0])
+        )
+        group_skills = membership @ self.presence  # (groups, skills) postings per group listing each skill
+        return pd.Series(group_skills.getnnz(axis=1), index=labels)
+
+    def cooccurrence(self, top=20):
+        """
+        How many postings list each pair of the top skills together
+
+        Returns:
+            Symmetric DataFrame over the `top` most frequent skills; the
+            diagonal is the number of postings listing that skill
+        """
+        columns = self.skills.get_indexer(self.counts(top).index)
+        presence = self.presence[:, columns]
+        pairs = (presence.T @ presence).toarray()
+        labels = self.skills[columns]
+        return pd.DataFrame(pairs, index=labels, columns=labels)
@@ -0,0 +1,135 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# Words, keeping skill spellings such as "c++", "c#" and "node.js" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+def tokenize(text):
+    """Lower-case a text and split it into index terms"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+class _Vocabulary:
+    """Sorted terms joined into one string so substring lookups run in C"""
+
+    def __init__(self, terms):
+        self.terms = sorted(terms)
+        self.blob = "\n".join(self.terms)
+        lengths = np.fromiter((len(t) + 1 for t in self.terms), dtype=np.int64, count=len(self.terms))
+        self.starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if self.terms else np.zeros(0, dtype=np.int64)
+
+    def containing(self, needle):
+        """Terms that contain needle as a substring"""
+        positions = [m.start() for m in re.finditer(re.escape(needle), self.blob)]
+        if not positions:
+            return []
+        idx = np.unique(np.searchsorted(self.starts, positions, side="right") - 1)
+        return [self.terms[i] for i in idx]
+
+class InvertedIndex:
+    """
+    Inverted index over a column of text
+
+    Every term and every pair of adjacent terms maps to the sorted row
+    positions of the documents containing it, alongside its frequency in
+    each of them for BM25 ranking. Keyword lookups expand the
+    keyword against the vocabulary (substring match, like the old
+    `keyword in description` scan) and union the posting lists, so their
+    cost does not depend on how long the documents are.
+    """
+
+    def __init__(self, texts, cache_size=1024):
+        unigrams, bigrams = {}, {}
+        doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text) if isinstance(text, str) else []
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                unigrams.setdefault(term, []).append((doc_id, tf))
+            for term, tf in Counter(f"{a} {b}" for a, b in zip(tokens, tokens[1:])).items():
+                bigrams.setdefault(term, []).append((doc_id, tf))
+
+        self.num_docs = len(doc_lengths)
+        self.doc_lengths = np.array(doc_lengths, dtype=np.int32)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if self.num_docs else 0.0
+        self.postings, self.term_freqs = _build_postings(unigrams)
+        self.phrase_postings, self.phrase_freqs = _build_postings(bigrams)
+        self._terms = _Vocabulary(self.postings)
+        self._phrases = _Vocabulary(self.phrase_postings)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @property
+    def vocabulary(self):
+        return self._terms.terms
+
+    def expand(self, keyword):
+        """
+        Vocabulary entries matching a keyword
+
+        A single word matches every term containing it ("java" finds
+        "javascript"); a multi-word keyword such as "machine learning" is
+        matched against the adjacent-term pairs, one group per pair, so
+        longer phrases find documents containing all of their word pairs.
+
+        Returns:
+            list of (postings dict, matching terms) groups, all of which must match
+        """
+        tokens = tokenize(keyword)
+        if len(tokens) == 1:
+            return [(self.postings, self._terms.containing(tokens[0]))]
+        return [(self.phrase_postings, self._phrases.containing(f"{a} {b}"))
+                for a, b in zip(tokens, tokens[1:])]
+
+    def _lookup(self, keyword):
+        """Sorted row positions of documents matching one keyword"""
+        result = None
+        for postings, terms in self.expand(keyword):
+            ids = _union([postings[t] for t in terms])
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        return result if result is not None else np.zeros(0, dtype=np.int32)
+
+    def match(self, keywords):
+        """Sorted row positions of documents matching any of the keywords"""
+        return _union([self.lookup(k) for k in keywords])
+
+    def bm25(self, keywords, k1=1.2, b=0.75):
+        """
+        Okapi BM25 score of every document for a set of keywords
+
+        Uses only the precomputed term frequencies and document lengths;
+        each keyword contributes through the vocabulary terms it expands to.
+
+        Returns:
+            float64 array with one score per document
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        if not self.num_docs or not self.avg_doc_length:
+            return scores
+        norm = k1 * (1 - b + b * self.doc_lengths / self.avg_doc_length)
+        for keyword in keywords:
+            for postings, terms in self.expand(keyword):
+                freqs = self.term_freqs if postings is self.postings else self.phrase_freqs
+                for term in terms:
+                    ids, tf = postings[term], freqs[term]
+                    idf = np.log(1 + (self.num_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+                    scores[ids] += idf * tf * (k1 + 1) / (tf + norm[ids])
+        return scores
+
+def _build_postings(entries):
+    """Split term -> [(doc_id, tf)] lists into posting and frequency arrays"""
+    postings, freqs = {}, {}
+    for term, pairs in entries.items():
+        ids, tf = zip(*pairs)
+        postings[term] = np.array(ids, dtype=np.int32)
+        freqs[term] = np.array(tf, dtype=np.float32)
+    return postings, freqs
+
+def _union(posting_lists):
+    posting_lists = [p for p in posting_lists if len(p)]
+    if not posting_lists:
+        return np.zeros(0, dtype=np.int32)
+    if len(posting_lists) == 1:
+        return posting_lists[0]
+    return np.unique(np.concatenate(posting_lists))
@@ -0,0 +1,63 @@
+import bisect
+import heapq
+from collections import Counter
+
+from .search import normalize_location, split_skills
+
+class PrefixIndex:
+    """
+    Prefix suggestions over a fixed vocabulary
+
+    Keys are kept in one sorted list and looked up with bisect. Every word
+    of a multi-word value is indexed too, so "learn" suggests
+    "Machine Learning". Matches are ranked by how often a value occurs.
+    """
+
+    def __init__(self, values):
+        counts = Counter(v.strip() for v in values if isinstance(v, str) and v.strip())
+
+        # Keep the most common spelling of values that differ only in case
+        display = {}
+        for value, count in counts.most_common():
+            display.setdefault(value.lower(), value)
+        weights = Counter()
+        for value, count in counts.items():
+            weights[value.lower()] += count
+
+        self.values = sorted(display.values(), key=str.lower)
+        self._weights = [weights[v.lower()] for v in self.values]
+
+        entries = []
+        for value_id, value in enumerate(self.values):
+            words = value.lower().split()
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), value_id))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = [value_id for _, value_id in entries]
+
+    def __len__(self):
+        return len(self.values)
+
+    def suggest(self, prefix, limit=8):
+        """Most frequent values with a word starting with prefix"""
+        prefix = " ".join(str(prefix).lower().split())
+        if not prefix:
+            return []
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\uffff")
+        matches = set(self._ids[lo:hi])
+        best = heapq.nlargest(limit, matches, key=lambda i: (self._weights[i], -i))
+        return [self.values[i] for i in best]
+
+class Typeahead:
+    """Suggestion indexes for the search and recommendation forms, built once per dataset"""
+
+    def __init__(self, df):
+        cities = df["location"].map(normalize_location)
+        self.skills = PrefixIndex(s for value in df["skills_required"] for s in split_skills(value))
+        self.locations = PrefixIndex(cities)
+        self.companies = PrefixIndex(df["company"])
+
+        # Options for the city selectboxes, sorted once instead of on every rerun
+        self.cities = self.locations.values
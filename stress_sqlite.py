@@ -0,0 +1,111 @@
+"""
+SQLite concurrency stress test
+==============================
+
+Many threads apply to internships and read their application history at
+the same time, as concurrent Streamlit sessions do during apply bursts.
+Runs the same workload against an engine with and without the SQLite
+tuning from src/database.py and reports throughput and lock errors.
+
+Usage:
+    python stress_sqlite.py --threads 32 --seconds 10
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from src.database import create_pooled_engine
+from src.migrations import run_migrations
+
+APPLY = text("""
+    INSERT INTO applications (username, job_title, company, location)
+    VALUES (:username, :job_title, :company, :location)
+""")
+
+HISTORY = text("""
+    SELECT job_title, company, location, applied_at
+    FROM applications
+    WHERE LOWER(username)=:username
+    ORDER BY applied_at DESC
+""")
+
+def untuned_engine(url):
+    # What the app used before: default rollback journal, default busy timeout
+    return create_engine(url, poolclass=QueuePool, pool_size=5, max_overflow=64,
+                         connect_args={'check_same_thread': False})
+
+def worker(engine, student, stop, counters, lock):
+    applies = reads = lock_errors = other_errors = 0
+    n = 0
+    while not stop.is_set():
+        n += 1
+        try:
+            with engine.begin() as conn:
+                conn.execute(APPLY, {"username": student, "job_title": f"Intern {n}",
+                                     "company": f"Company {n % 40}", "location": "Bangalore"})
+            applies += 1
+            with engine.connect() as conn:
+                conn.execute(HISTORY, {"username": student}).fetchall()
+            reads += 1
+        except OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                lock_errors += 1
+            else:
+                other_errors += 1
+    with lock:
+        counters['applies'] += applies
+        counters['reads'] += reads
+        counters['lock_errors'] += lock_errors
+        counters['other_errors'] += other_errors
+
+def run(engine, threads, seconds):
+    run_migrations(engine)
+    counters = {'applies': 0, 'reads': 0, 'lock_errors': 0, 'other_errors': 0}
+    stop = threading.Event()
+    lock = threading.Lock()
+    pool = [threading.Thread(target=worker, args=(engine, f"student{i}", stop, counters, lock))
+            for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    counters['ops_per_sec'] = round((counters['applies'] + counters['reads']) / elapsed, 1)
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for name, factory in [("untuned", untuned_engine), ("tuned (WAL)", create_pooled_engine)]:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            results[name] = run(factory(f"sqlite:///{path}"), args.threads, args.seconds)
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    print(f"{args.threads} threads for {args.seconds:g}s")
+    print(f"{'':<14}{'applies':>10}{'reads':>10}{'ops/s':>10}{'locked':>10}{'other':>8}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['applies']:>10}{r['reads']:>10}{r['ops_per_sec']:>10}"
+              f"{r['lock_errors']:>10}{r['other_errors']:>8}")
+
+if __name__ == "__main__":
+    main()